@@ -190,8 +190,9 @@ class AzureResourceGraphCollector:
                     type=resource.get("type", "unknown"),
                     location=resource.get("location", "unknown"),
                     resource_group=resource_group,
-                    tags=resource.get("tags", {}),
-                    properties=resource.get("properties", {}),
+                    # Resource Graph returns null for untagged/propertyless resources
+                    tags=resource.get("tags") or {},
+                    properties=resource.get("properties") or {},
                 )
                 resources.append(azure_resource)
                 logger.debug(
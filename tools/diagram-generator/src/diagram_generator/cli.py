@@ -5,6 +5,7 @@ Orchestrates data collection, correlation, and diagram generation.
 """
 
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
@@ -96,6 +97,11 @@ logger = get_logger(__name__)
     type=click.Path(path_type=Path),
     help="Output directory for diagram files (default: current directory)",
 )
+@click.option(
+    "--pretty",
+    is_flag=True,
+    help="Indent the generated .drawio XML (larger file, easier to diff)",
+)
 @click.option(
     "--no-auto-layout",
     is_flag=True,
@@ -131,6 +137,7 @@ def main(
     f5xc_key_path: Optional[Path],
     diagram_title: str,
     output_dir: Optional[Path],
+    pretty: bool,
     no_auto_layout: bool,
     no_grouping: bool,
     no_drift_detection: bool,
@@ -224,6 +231,21 @@ def main(
         # Phase 1: Collect resources from all sources
         click.echo("📊 Phase 1: Collecting infrastructure resources...")
 
+        # F5 XC does not depend on Terraform or Azure results, so its REST calls run in the
+        # background while terraform show and the Resource Graph queries run here
+        f5xc_collector = F5XCCollector(
+            tenant=config_data.f5xc_tenant,
+            auth_method=config_data.f5xc_auth_method,
+            api_token=config_data.f5xc_api_token,
+            p12_cert_path=config_data.f5xc_p12_cert_path,
+            p12_password=config_data.f5xc_p12_password,
+            cert_path=str(f5xc_cert_path) if f5xc_cert_path else None,
+            key_path=str(f5xc_key_path) if f5xc_key_path else None,
+        )
+        f5xc_executor = ThreadPoolExecutor(max_workers=1)
+        f5xc_future = f5xc_executor.submit(f5xc_collector.collect_resources)
+        f5xc_executor.shutdown(wait=False)
+
         terraform_collector = TerraformStateCollector(
             state_path=(
                 str(config_data.terraform_state_path) if config_data.terraform_state_path else None
@@ -255,16 +277,7 @@ def main(
         click.echo(f"  ✓ Collected {len(lb_relationships)} LB relationships")
         click.echo(f"  ✓ Collected {len(route_relationships)} route table relationships")
 
-        f5xc_collector = F5XCCollector(
-            tenant=config_data.f5xc_tenant,
-            auth_method=config_data.f5xc_auth_method,
-            api_token=config_data.f5xc_api_token,
-            p12_cert_path=config_data.f5xc_p12_cert_path,
-            p12_password=config_data.f5xc_p12_password,
-            cert_path=str(f5xc_cert_path) if f5xc_cert_path else None,
-            key_path=str(f5xc_key_path) if f5xc_key_path else None,
-        )
-        f5xc_resources = f5xc_collector.collect_resources()
+        f5xc_resources = f5xc_future.result()
         click.echo(f"  ✓ Collected {len(f5xc_resources)} F5 XC resources")
 
         # Phase 2: Correlate resources
@@ -291,17 +304,19 @@ def main(
         click.echo("\n🎨 Phase 3: Generating Draw.io diagram...")
 
         # Generate diagram with traffic flow relationships
-        diagram_generator = DrawioDiagramGenerator(
+        with DrawioDiagramGenerator(
             title=config_data.diagram_title,
             auto_layout=config_data.auto_layout,
             group_by_platform=config_data.group_by_platform,
             output_dir=output_dir,
-        )
-        document = diagram_generator.generate(
-            correlated,
-            lb_relationships=lb_relationships,
-            route_relationships=route_relationships,
-        )
+            pretty=pretty,
+        ) as diagram_generator:
+            document = diagram_generator.generate(
+                correlated,
+                lb_relationships=lb_relationships,
+                route_relationships=route_relationships,
+            )
+            document.wait_for_image()
 
         click.echo("\n✅ Diagram generated successfully!")
         click.echo(f"   📄 Draw.io file: {document.file_path}")
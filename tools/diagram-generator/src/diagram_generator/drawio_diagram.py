@@ -5,12 +5,14 @@ Converts correlated resources into draw.io (diagrams.net) mxGraph XML format.
 """
 
 import subprocess  # nosec B404 - Controlled subprocess for drawio CLI export
+import tempfile
 import uuid
 import xml.etree.ElementTree as ET  # nosec B405 - XML generation for trusted diagram data
+from collections import defaultdict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Optional
 from urllib.parse import unquote
-from xml.dom import minidom  # nosec B408 - XML formatting for generated diagram data
 
 from diagram_generator.exceptions import DiagramGenerationError
 from diagram_generator.models import CorrelatedResources, DrawioDocument, ResourceSource
@@ -29,6 +31,14 @@ class DrawioDiagramGenerator:
         ResourceSource.F5XC: "#50C878",  # Green
     }
 
+    # Display name per resource source, in horizontal layout order
+    # (str-Enum members hash like their values, so plain strings match too)
+    PLATFORM_NAMES = {
+        ResourceSource.TERRAFORM: "Terraform",
+        ResourceSource.AZURE: "Azure",
+        ResourceSource.F5XC: "F5 XC",
+    }
+
     # Azure official color palette (matching Microsoft Learn diagrams)
     AZURE_COLORS = {
         "vnet": "#0078D4",  # Azure blue for VNets
@@ -63,6 +73,26 @@ class DrawioDiagramGenerator:
         "default": "rounded=1;whiteSpace=wrap;html=1;fillColor=#E8F4F8;strokeColor=#0078D4;strokeWidth=1;",
     }
 
+    # Azure short resource type -> AZURE_SHAPE_STYLES key for the geometric fallback
+    AZURE_TYPE_STYLES = {
+        "virtualmachines": "vm",
+        "virtualmachinescalesets": "vm",
+        "loadbalancers": "lb",
+        "applicationgateways": "gateway",
+        "virtualnetworkgateways": "gateway",
+        "localnetworkgateways": "gateway",
+        "natgateways": "gateway",
+        "networksecuritygroups": "nsg",
+        "networkinterfaces": "nic",
+        "publicipaddresses": "pip",
+        "routetables": "route_table",
+    }
+
+    # Non-Azure resource type token (split on "_") -> AZURE_SHAPE_STYLES key
+    RESOURCE_TYPE_TOKEN_STYLES = {
+        "site": "f5xc_site",
+    }
+
     # Traffic flow arrow styles (matching Microsoft Learn)
     # Using official Azure brand colors: #0078D4 (Azure Blue), #107C10 (Success Green)
     # Thick 6px arrows for high visibility matching Microsoft Learn diagrams
@@ -83,6 +113,7 @@ class DrawioDiagramGenerator:
         auto_layout: bool = True,
         group_by_platform: bool = True,
         output_dir: Optional[Path] = None,
+        pretty: bool = False,
     ):
         """
         Initialize draw.io diagram generator.
@@ -92,11 +123,22 @@ class DrawioDiagramGenerator:
             auto_layout: Enable automatic layout (hierarchical)
             group_by_platform: Group resources by platform (Terraform/Azure/F5 XC)
             output_dir: Output directory for diagram files (default: current directory)
+            pretty: Indent the saved .drawio XML (default: compact single-line output)
         """
         self.title = title
         self.auto_layout = auto_layout
         self.group_by_platform = group_by_platform
         self.output_dir = (output_dir or Path.cwd()).resolve()
+        self.pretty = pretty
+
+        # drawio CLI exports run here so generate() returns once the .drawio file is saved;
+        # close() (or leaving a with block) waits for them, releases the threads and
+        # re-raises any export failure
+        self._export_executor = ThreadPoolExecutor(max_workers=2)
+        self._pending_exports: list[Future] = []
+
+        # Relationship type -> resolved connection style, filled on first use
+        self._connection_styles: dict[str, tuple[str, str, bool]] = {}
 
         # Initialize Azure shape library (replaces broken icon converter)
         from diagram_generator.azure_shape_library import get_azure_shape_library
@@ -121,6 +163,36 @@ class DrawioDiagramGenerator:
             output_dir=str(self.output_dir),
         )
 
+    def close(self) -> None:
+        """
+        Wait for pending SVG exports and shut down the export worker threads.
+
+        Raises:
+            DiagramGenerationError: If any background SVG export failed
+        """
+        self._export_executor.shutdown(wait=True)
+        pending, self._pending_exports = self._pending_exports, []
+
+        errors = [future.exception() for future in pending]
+        failures = [error for error in errors if error is not None]
+        if failures:
+            raise DiagramGenerationError(
+                f"{len(failures)} SVG export(s) failed: {failures[0]}"
+            ) from failures[0]
+
+    def __enter__(self) -> "DrawioDiagramGenerator":
+        return self
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        # Already unwinding: still wait for the exports, but keep the original error
+        try:
+            self.close()
+        except DiagramGenerationError as e:
+            logger.error("SVG export failed during generator shutdown", error=str(e))
+
     def generate(
         self,
         correlated_resources: CorrelatedResources,
@@ -156,25 +228,101 @@ class DrawioDiagramGenerator:
             # Save to file
             output_file = self._save_diagram(diagram_xml)
 
-            # Export to SVG (properly renders embedded base64 SVG icons)
-            svg_file = self._export_to_svg(output_file)
+            # Export to SVG (properly renders embedded base64 SVG icons) in the
+            # background; callers that need the image use wait_for_image(), and export
+            # failures are re-raised from there or from close()
+            document = self._start_image_export(output_file, self.title)
 
             logger.info(
                 "Draw.io diagram generated successfully",
                 file_path=str(output_file),
-                image_file_path=str(svg_file),
+                image_file_path=str(document.image_file_path),
             )
 
-            return DrawioDocument(
-                file_path=output_file,
-                image_file_path=svg_file,
-                title=self.title,
-            )
+            return document
 
         except Exception as e:
             logger.error("Draw.io diagram generation failed", error=str(e))
             raise DiagramGenerationError(f"Failed to generate draw.io diagram: {e}") from e
 
+    def generate_batch(
+        self,
+        jobs: dict[str, CorrelatedResources],
+        max_workers: Optional[int] = None,
+    ) -> list[DrawioDocument]:
+        """
+        Generate several draw.io diagrams, building their XML in parallel.
+
+        XML construction is CPU-bound and independent per diagram, so it runs in a
+        process pool; the drawio CLI SVG exports then run in the background until
+        waited on per document or released together with close().
+
+        Args:
+            jobs: Mapping of diagram title to the correlated resources to draw
+            max_workers: Worker process count (default: number of CPUs)
+
+        Returns:
+            DrawioDocument for each job, in input order
+
+        Raises:
+            DiagramGenerationError: If two titles map to the same output file, or if
+                any diagram fails to build
+        """
+        logger.info("Generating draw.io diagram batch", diagram_count=len(jobs))
+
+        # Titles are sanitized into filenames, so distinct titles can collide (and on
+        # case-insensitive filesystems, differ only in case); parallel workers would
+        # then silently overwrite each other's files
+        seen: dict[str, str] = {}
+        for title in jobs:
+            filename = _safe_filename(title).casefold()
+            if filename in seen:
+                raise DiagramGenerationError(
+                    f"Diagram titles {seen[filename]!r} and {title!r} map to the same output file"
+                )
+            seen[filename] = title
+
+        options = {
+            "auto_layout": self.auto_layout,
+            "group_by_platform": self.group_by_platform,
+            "output_dir": self.output_dir,
+            "pretty": self.pretty,
+        }
+        titles = list(jobs)
+
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                drawio_files = list(
+                    executor.map(
+                        _build_and_save_diagram,
+                        titles,
+                        [options] * len(titles),
+                        jobs.values(),
+                    )
+                )
+
+            return [
+                self._start_image_export(drawio_file, title)
+                for title, drawio_file in zip(titles, drawio_files)
+            ]
+
+        except Exception as e:
+            logger.error("Draw.io batch generation failed", error=str(e))
+            raise DiagramGenerationError(f"Failed to generate draw.io diagrams: {e}") from e
+
+    def _start_image_export(self, drawio_file: Path, title: str) -> DrawioDocument:
+        """Submit the SVG export for a saved diagram and return its pending document."""
+        image_export = self._export_executor.submit(self._export_to_svg, drawio_file)
+        # Log failures as they happen, so callers that never wait still see them
+        image_export.add_done_callback(_log_export_failure)
+        self._pending_exports.append(image_export)
+        return DrawioDocument(
+            file_path=drawio_file,
+            image_file_path=drawio_file.with_suffix(".svg"),
+            title=title,
+            image_export=image_export,
+        )
+
     def _create_diagram_xml(
         self,
         correlated_resources: CorrelatedResources,
@@ -185,11 +333,11 @@ class DrawioDiagramGenerator:
         # Root mxfile element
         mxfile = ET.Element("mxfile", host="app.diagrams.net", type="device")
 
-        # Diagram element
+        # Diagram element (id derived from the title so identical input gives identical bytes)
         diagram = ET.SubElement(
             mxfile,
             "diagram",
-            id=str(uuid.uuid4()),
+            id=str(uuid.uuid5(uuid.NAMESPACE_URL, self.title)),
             name=self.title,
         )
 
@@ -221,7 +369,9 @@ class DrawioDiagramGenerator:
         cell_1.set("parent", "0")
 
         # Generate shapes and get content height
-        shapes, max_content_height = self._generate_shapes(root, correlated_resources.resources)
+        shapes, max_content_height, cell_id = self._generate_shapes(
+            root, correlated_resources.resources
+        )
 
         # Detect traffic flows from Azure topology
         traffic_flows = []
@@ -252,10 +402,9 @@ class DrawioDiagramGenerator:
             )()
             all_relationships.append(flow_relationship)
 
-        self._generate_connections(root, all_relationships, shapes)
+        cell_id = self._generate_connections(root, all_relationships, shapes, cell_id)
 
         # Add Microsoft Learn styling elements
-        cell_id = len(root) + 1
 
         # Add Internet cloud at the top (centered above hub VNet)
         # Use hub VNet position from layout tracking or fallback to default
@@ -291,7 +440,7 @@ class DrawioDiagramGenerator:
 
     def _generate_shapes(
         self, root: ET.Element, resources: list[Any]
-    ) -> tuple[dict[str, str], int]:
+    ) -> tuple[dict[str, str], int, int]:
         """
         Generate hierarchical mxGraph shapes for resources.
 
@@ -299,7 +448,7 @@ class DrawioDiagramGenerator:
         Matches Microsoft Learn diagram style with proper nesting.
 
         Returns:
-            Tuple of (shape_id_map, max_content_height)
+            Tuple of (shape_id_map, max_content_height, next_cell_id)
         """
         shapes = {}
         cell_id_counter = 2  # Start after default cells (0 and 1)
@@ -350,7 +499,7 @@ class DrawioDiagramGenerator:
             cell_id_counter, shapes = self._create_flat_layout(root, resources, cell_id_counter)
             max_content_height = 500  # Default height for flat layout
 
-        return shapes, max_content_height
+        return shapes, max_content_height, cell_id_counter
 
     def _create_azure_hierarchy(
         self, root: ET.Element, resources: list[Any], x_offset: int, cell_id: int
@@ -908,13 +1057,22 @@ class DrawioDiagramGenerator:
         root: ET.Element,
         relationships: list[Any],
         shapes: dict[str, str],
-    ) -> None:
+        cell_id: int,
+    ) -> int:
         """
         Generate mxGraph connections for relationships.
 
         Uses Microsoft Learn-style traffic flow arrows for different connection types.
+
+        Args:
+            root: mxGraph root element
+            relationships: Relationships to draw as edges
+            shapes: Map of resource IDs to shape cell IDs
+            cell_id: First free cell ID (continues the shape counter)
+
+        Returns:
+            Next available cell ID
         """
-        cell_id = len(root) + 1
 
         for relationship in relationships:
             source_id = shapes.get(relationship.source_id)
@@ -929,26 +1087,18 @@ class DrawioDiagramGenerator:
                 continue
 
             # Determine traffic flow style based on relationship type
-            relationship_type = str(relationship.relationship_type).lower()
-
-            if "peering" in relationship_type or "vnet_peering" in relationship_type:
-                style = self.TRAFFIC_FLOW_STYLES["peering"]
-                label = "VNet Peering"
-            elif "gateway" in relationship_type:
-                style = self.TRAFFIC_FLOW_STYLES["gateway_connection"]
-                label = relationship.metadata.get("label", "Gateway")
-            elif "f5xc" in relationship_type or "nva" in relationship_type:
-                style = self.TRAFFIC_FLOW_STYLES["nva_traffic"]
-                label = relationship.metadata.get("label", "Through NVA")
-            elif "internet" in relationship_type or "public" in relationship_type:
-                style = self.TRAFFIC_FLOW_STYLES["north_south"]
-                label = relationship.metadata.get("label", "Internet Traffic")
-            elif "internal" in relationship_type or "east_west" in relationship_type:
-                style = self.TRAFFIC_FLOW_STYLES["east_west"]
-                label = relationship.metadata.get("label", "Internal Traffic")
-            else:
-                style = self.TRAFFIC_FLOW_STYLES["dependency"]
-                label = relationship.metadata.get("label", str(relationship.relationship_type))
+            relationship_type = str(relationship.relationship_type)
+            connection_style = self._connection_styles.get(relationship_type)
+            if connection_style is None:
+                connection_style = self._resolve_connection_style(relationship_type)
+                self._connection_styles[relationship_type] = connection_style
+
+            style, default_label, use_metadata_label = connection_style
+            label = (
+                relationship.metadata.get("label", default_label)
+                if use_metadata_label
+                else default_label
+            )
 
             # Create edge cell
             edge_cell = ET.SubElement(
@@ -991,19 +1141,41 @@ class DrawioDiagramGenerator:
 
             cell_id += 1
 
+        return cell_id
+
+    def _resolve_connection_style(self, relationship_type: str) -> tuple[str, str, bool]:
+        """
+        Classify a relationship type into its traffic flow style.
+
+        Returns:
+            Tuple of (style, default_label, use_metadata_label)
+        """
+        rel_type = relationship_type.lower()
+
+        if "peering" in rel_type or "vnet_peering" in rel_type:
+            return self.TRAFFIC_FLOW_STYLES["peering"], "VNet Peering", False
+        if "gateway" in rel_type:
+            return self.TRAFFIC_FLOW_STYLES["gateway_connection"], "Gateway", True
+        if "f5xc" in rel_type or "nva" in rel_type:
+            return self.TRAFFIC_FLOW_STYLES["nva_traffic"], "Through NVA", True
+        if "internet" in rel_type or "public" in rel_type:
+            return self.TRAFFIC_FLOW_STYLES["north_south"], "Internet Traffic", True
+        if "internal" in rel_type or "east_west" in rel_type:
+            return self.TRAFFIC_FLOW_STYLES["east_west"], "Internal Traffic", True
+        return self.TRAFFIC_FLOW_STYLES["dependency"], relationship_type, True
+
     def _get_resource_style(self, resource: Any) -> str:
         """Get draw.io style for resource type (backward compatibility)."""
-        resource_type = get_resource_short_name(resource.get("type", "")).lower()
-
         # Use new Azure shape styles if Azure resource
         if resource.get("source") in [ResourceSource.AZURE, "azure"]:
             return self._get_azure_resource_style(resource)
 
-        # Fallback to simple styles for non-Azure
-        if "site" in resource_type:
-            return self.AZURE_SHAPE_STYLES["f5xc_site"]
-        else:
-            return self.AZURE_SHAPE_STYLES["default"]
+        # Fallback to simple styles for non-Azure (e.g. virtual_site -> "site" token)
+        for token in resource.get("type", "").lower().split("_"):
+            style_key = self.RESOURCE_TYPE_TOKEN_STYLES.get(token)
+            if style_key:
+                return self.AZURE_SHAPE_STYLES[style_key]
+        return self.AZURE_SHAPE_STYLES["default"]
 
     def _get_azure_shape_xml(
         self, resource: Any
@@ -1120,6 +1292,11 @@ class DrawioDiagramGenerator:
             f"⚠️  No Azure icon available for {resource_type}, falling back to geometric shapes",
             resource_name=resource_name,
         )
+        style_key = self.AZURE_TYPE_STYLES.get(resource_type)
+        if style_key:
+            return self.AZURE_SHAPE_STYLES[style_key]
+
+        # Substring matching for types not in the lookup table
         if "virtualmachine" in resource_type or "vm" in resource_type:
             return self.AZURE_SHAPE_STYLES["vm"]
         elif "loadbalancer" in resource_type or "_lb" in resource_type:
@@ -1758,23 +1935,16 @@ class DrawioDiagramGenerator:
 
     def _group_resources_by_platform(self, resources: list[Any]) -> dict[str, list[Any]]:
         """Group resources by source platform."""
-        grouped: dict[str, list[Any]] = {
-            "Terraform": [],
-            "Azure": [],
-            "F5 XC": [],
-        }
+        grouped: defaultdict[str, list[Any]] = defaultdict(list)
+        platform_names = self.PLATFORM_NAMES
 
         for resource in resources:
-            source = resource.get("source", "")
-            if source == ResourceSource.TERRAFORM or source == "terraform":
-                grouped["Terraform"].append(resource)
-            elif source == ResourceSource.AZURE or source == "azure":
-                grouped["Azure"].append(resource)
-            elif source == ResourceSource.F5XC or source == "f5xc":
-                grouped["F5 XC"].append(resource)
+            platform = platform_names.get(resource.get("source", ""))
+            if platform:
+                grouped[platform].append(resource)
 
-        # Remove empty groups
-        return {k: v for k, v in grouped.items() if v}
+        # Keep the fixed platform order (drives horizontal layout); empty groups never exist
+        return {name: grouped[name] for name in platform_names.values() if name in grouped}
 
     def _add_internet_cloud(
         self, root: ET.Element, cell_id: int, hub_vnet_x: int = 700, hub_vnet_width: int = 850
@@ -1980,19 +2150,14 @@ class DrawioDiagramGenerator:
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
         # Generate filename
-        safe_title = "".join(c if c.isalnum() or c in ("-", "_") else "_" for c in self.title)
-        output_file = self.output_dir / f"{safe_title}.drawio"
+        output_file = self.output_dir / f"{_safe_filename(self.title)}.drawio"
 
-        # Pretty print XML
-        xml_string = ET.tostring(diagram_xml, encoding="unicode")
-        dom = minidom.parseString(
-            xml_string
-        )  # nosec B318 - Parsing generated diagram XML, not user input
-        pretty_xml = dom.toprettyxml(indent="  ")
+        if self.pretty:
+            # Indent in place (human-readable, larger file)
+            ET.indent(diagram_xml, space="  ")
 
-        # Write to file
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(pretty_xml)
+        # Single C-level serialization pass straight to the file
+        ET.ElementTree(diagram_xml).write(output_file, encoding="utf-8", xml_declaration=True)
 
         logger.info("Diagram saved to file", path=str(output_file))
         return output_file
@@ -2022,24 +2187,27 @@ class DrawioDiagramGenerator:
             # --transparent: transparent background
             # --border 10: add border around diagram
             # --crop: crop to diagram size
-            subprocess.run(  # nosec B603 B607 - Controlled drawio CLI export with fixed args
-                [
-                    "drawio",
-                    "--export",
-                    "--format",
-                    "svg",
-                    "--transparent",
-                    "--border",
-                    "10",
-                    "--crop",
-                    "--output",
-                    str(svg_file),
-                    str(drawio_file),
-                ],
-                capture_output=True,
-                text=True,
-                check=True,
-            )
+            # --user-data-dir: private profile so concurrent exports don't share a disk cache
+            with tempfile.TemporaryDirectory(prefix="drawio-") as user_data_dir:
+                subprocess.run(  # nosec B603 B607 - Controlled drawio CLI export with fixed args
+                    [
+                        "drawio",
+                        "--export",
+                        "--format",
+                        "svg",
+                        "--transparent",
+                        "--border",
+                        "10",
+                        "--crop",
+                        "--output",
+                        str(svg_file),
+                        f"--user-data-dir={user_data_dir}",
+                        str(drawio_file),
+                    ],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                )
 
             logger.info("SVG export successful", svg_file=str(svg_file))
             return svg_file
@@ -2052,3 +2220,29 @@ class DrawioDiagramGenerator:
             error_msg = "drawio CLI not found. Install with: brew install --cask drawio"
             logger.error(error_msg)
             raise DiagramGenerationError(error_msg) from None
+
+
+def _log_export_failure(future: Future) -> None:
+    """Log a background SVG export error when its future completes."""
+    error = future.exception()
+    if error is not None:
+        logger.error("Background SVG export failed", error=str(error))
+
+
+def _safe_filename(title: str) -> str:
+    """Sanitize a diagram title into a filename stem (without extension)."""
+    return "".join(c if c.isalnum() or c in ("-", "_") else "_" for c in title)
+
+
+def _build_and_save_diagram(
+    title: str, options: dict[str, Any], correlated_resources: CorrelatedResources
+) -> Path:
+    """
+    Build and save one diagram inside a worker process.
+
+    Module-level so it can be pickled by ProcessPoolExecutor; each worker gets its
+    own generator (and layout state) rather than sharing the caller's instance.
+    """
+    with DrawioDiagramGenerator(title=title, **options) as generator:
+        diagram_xml = generator._create_diagram_xml(correlated_resources)
+        return generator._save_diagram(diagram_xml)
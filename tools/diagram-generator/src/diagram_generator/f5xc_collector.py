@@ -4,11 +4,26 @@ F5 Distributed Cloud REST API collection module.
 Retrieves resources from F5 XC via REST API (not vesctl CLI).
 """
 
+import asyncio
+import hashlib
+import os
 import tempfile
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
 from typing import Optional
 
+import orjson
 import requests
+from cryptography.exceptions import UnsupportedAlgorithm
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    NoEncryption,
+    PrivateFormat,
+    pkcs12,
+)
 
 from diagram_generator.exceptions import AuthenticationError, F5XCAPIError
 from diagram_generator.models import F5XCAuthMethod, F5XCResource
@@ -16,6 +31,41 @@ from diagram_generator.utils import create_http_session_with_retries, get_logger
 
 logger = get_logger(__name__)
 
+# All requests go to a single tenant host; keep enough keep-alive connections for
+# the concurrent collectors so TLS handshakes are not repeated per request, and
+# apply the request timeout at the adapter instead of on every call
+SESSION_POOL_CONNECTIONS = 1
+SESSION_POOL_MAXSIZE = 32
+SESSION_TIMEOUT = 30
+
+# Resource kind -> list endpoint template, interpolated with the namespace
+_ENDPOINTS = {
+    "http_loadbalancer": "config/namespaces/%s/http_loadbalancers",
+    "origin_pool": "config/namespaces/%s/origin_pools",
+    "virtual_site": "config/namespaces/%s/virtual_sites",
+    "site": "config/namespaces/%s/sites",
+}
+
+# Resource kind -> spec keys kept on collected resources, limited to keys something
+# reads; the rest of each spec, often the bulk of the response, is dropped. Add a key
+# here (with its consumer) before reading it from F5XCResource.spec
+_SPEC_FIELDS: dict[str, tuple[str, ...]] = {
+    "http_loadbalancer": (),
+    # ResourceCorrelator._match_origin_pool_to_vms matches origin IPs to Azure VMs
+    "origin_pool": ("origin_servers",),
+    "virtual_site": (),
+    "site": (),
+}
+
+# sha256(P12 bytes + password) -> (cert_path, key_path), shared by all collectors
+_P12_CACHE: dict[str, tuple[str, str]] = {}
+
+
+@lru_cache(maxsize=16)
+def _namespace_params(namespace: str) -> Mapping[str, str]:
+    """Return the shared, read-only query params for a namespace."""
+    return MappingProxyType({"namespace": namespace})
+
 
 class F5XCCollector:
     """Collects and parses F5 Distributed Cloud resources via REST API."""
@@ -48,6 +98,8 @@ class F5XCCollector:
         self.tenant = tenant
         self.auth_method = auth_method
         self.base_url = f"https://{tenant}.console.ves.volterra.io/api"
+        # Bind the tenant once rather than passing it on every log call
+        self.log = logger.bind(tenant=tenant)
 
         if auth_method == F5XCAuthMethod.API_TOKEN:
             if not api_token:
@@ -60,7 +112,7 @@ class F5XCCollector:
                 raise AuthenticationError("CERTIFICATE auth requires both cert_path and key_path")
             self.cert_path = cert_path
             self.key_path = key_path
-            logger.info("Using certificate and key files for authentication")
+            self.log.info("Using certificate and key files for authentication")
             self.session = self._initialize_cert_session()
         elif auth_method == F5XCAuthMethod.P12_CERTIFICATE:
             # P12 certificate extraction
@@ -68,14 +120,10 @@ class F5XCCollector:
                 raise AuthenticationError("P12_CERTIFICATE auth requires p12_cert_path")
             self.p12_cert_path = p12_cert_path
             self.p12_password = p12_password
-            logger.info("Will extract certificate and key from P12 file")
+            self.log.info("Will extract certificate and key from P12 file")
             self.session = self._initialize_cert_session()
 
-        logger.info(
-            "F5 XC collector initialized",
-            tenant=tenant,
-            auth_method=auth_method.value,
-        )
+        self.log.info("F5 XC collector initialized", auth_method=auth_method.value)
 
     def _initialize_token_session(self) -> requests.Session:
         """
@@ -84,10 +132,15 @@ class F5XCCollector:
         Returns:
             Configured requests Session
         """
-        session = create_http_session_with_retries()
+        session = create_http_session_with_retries(
+            pool_connections=SESSION_POOL_CONNECTIONS,
+            pool_maxsize=SESSION_POOL_MAXSIZE,
+            timeout=SESSION_TIMEOUT,
+        )
         session.headers.update(
             {
                 "Authorization": f"APIToken {self.api_token}",
+                "Accept": "application/json",
                 "Content-Type": "application/json",
             }
         )
@@ -110,30 +163,34 @@ class F5XCCollector:
             if hasattr(self, "cert_path") and hasattr(self, "key_path"):
                 cert_path = self.cert_path
                 key_path = self.key_path
-                logger.info(
+                self.log.info(
                     "Using provided certificate and key files", cert=cert_path, key=key_path
                 )
             else:
                 # Extract cert and key from P12 file
                 cert_path, key_path = self._extract_p12_certificate()
-                logger.info("Extracted certificate and key from P12 file")
+                self.log.info("Extracted certificate and key from P12 file")
 
             # Verify files exist
-            from pathlib import Path
-
             if not Path(cert_path).exists():
                 raise AuthenticationError(f"Certificate file not found: {cert_path}")
             if not Path(key_path).exists():
                 raise AuthenticationError(f"Key file not found: {key_path}")
 
-            session = create_http_session_with_retries()
+            session = create_http_session_with_retries(
+                pool_connections=SESSION_POOL_CONNECTIONS,
+                pool_maxsize=SESSION_POOL_MAXSIZE,
+                timeout=SESSION_TIMEOUT,
+            )
             session.cert = (cert_path, key_path)
-            session.headers.update({"Content-Type": "application/json"})
+            session.headers.update(
+                {"Accept": "application/json", "Content-Type": "application/json"}
+            )
 
             return session
 
         except Exception as e:
-            logger.error("Failed to initialize certificate authentication", error=str(e))
+            self.log.error("Failed to initialize certificate authentication", error=str(e))
             raise AuthenticationError(
                 f"Certificate authentication initialization failed: {e}"
             ) from e
@@ -142,76 +199,115 @@ class F5XCCollector:
         """
         Extract certificate and key from P12 file.
 
+        The P12 is decoded in-process with cryptography; the openssl CLI is only
+        used as a fallback for bundles using algorithms cryptography does not support. Results are
+        memoized per P12 content and password for the lifetime of the process.
+
         Returns:
             Tuple of (cert_path, key_path)
 
         Raises:
             AuthenticationError: If extraction fails
         """
-        import subprocess  # nosec B404 - Controlled subprocess for openssl CLI
+        try:
+            p12_data = Path(self.p12_cert_path).read_bytes()
+        except OSError as e:
+            raise AuthenticationError(f"Failed to read P12 certificate: {e}") from e
+
+        password = (self.p12_password or "").encode()
+        cache_key = hashlib.sha256(p12_data + password).hexdigest()
+        cached = _P12_CACHE.get(cache_key)
+        if cached and all(Path(path).exists() for path in cached):
+            self.log.debug("Reusing extracted P12 certificate", cert=cached[0], key=cached[1])
+            return cached
+
+        # Name the files by cache key so sessions holding paths for one P12 are never
+        # handed another bundle's certificate when a second P12 is extracted
+        temp_dir = Path(tempfile.gettempdir())
+        cert_path = temp_dir / f"f5xc_cert_{cache_key[:16]}.pem"
+        key_path = temp_dir / f"f5xc_key_{cache_key[:16]}.pem"
 
         try:
-            # Create temporary files for cert and key
-            temp_dir = Path(tempfile.gettempdir())
-            cert_path = temp_dir / "f5xc_cert.pem"
-            key_path = temp_dir / "f5xc_key.pem"
-
-            # Extract certificate (with legacy provider for OpenSSL 3.x compatibility)
-            subprocess.run(  # nosec B603 B607 - Controlled openssl execution with user cert file
-                [
-                    "openssl",
-                    "pkcs12",
-                    "-in",
-                    self.p12_cert_path,
-                    "-clcerts",
-                    "-nokeys",
-                    "-out",
-                    str(cert_path),
-                    "-passin",
-                    f"pass:{self.p12_password or ''}",
-                    "-legacy",  # Support legacy algorithms like RC2-40-CBC
-                ],
-                check=True,
-                capture_output=True,
-                text=True,
+            key, cert, _ = pkcs12.load_key_and_certificates(p12_data, password)
+        except UnsupportedAlgorithm as e:
+            self.log.debug(
+                "In-process P12 extraction failed, falling back to openssl", error=str(e)
             )
+            self._extract_p12_certificate_openssl(cert_path, key_path)
+        except ValueError as e:
+            # Wrong password or not a P12 bundle; openssl would fail the same way
+            raise AuthenticationError(f"Invalid P12 password or file format: {e}") from e
+        else:
+            if key is None or cert is None:
+                raise AuthenticationError("P12 certificate does not contain a certificate and key")
+            cert_path.write_bytes(cert.public_bytes(Encoding.PEM))
+            # Create the key file owner-only so the private key is never world-readable
+            fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as key_file:
+                os.fchmod(key_file.fileno(), 0o600)  # mode only applies to new files
+                key_file.write(key.private_bytes(Encoding.PEM, PrivateFormat.PKCS8, NoEncryption()))
+
+        self.log.info("P12 certificate extracted successfully")
+        _P12_CACHE[cache_key] = (str(cert_path), str(key_path))
+        return _P12_CACHE[cache_key]
+
+    def _extract_p12_certificate_openssl(self, cert_path: Path, key_path: Path) -> None:
+        """
+        Extract certificate and key from P12 file using the openssl CLI.
 
-            # Extract private key (with legacy provider for OpenSSL 3.x compatibility)
-            subprocess.run(  # nosec B603 B607 - Controlled openssl execution with user cert file
-                [
-                    "openssl",
-                    "pkcs12",
-                    "-in",
-                    self.p12_cert_path,
-                    "-nocerts",
-                    "-nodes",
-                    "-out",
-                    str(key_path),
-                    "-passin",
-                    f"pass:{self.p12_password or ''}",
-                    "-legacy",  # Support legacy algorithms like RC2-40-CBC
-                ],
-                check=True,
-                capture_output=True,
-                text=True,
-            )
+        Args:
+            cert_path: Destination for the PEM certificate
+            key_path: Destination for the PEM private key
+
+        Raises:
+            AuthenticationError: If extraction fails
+        """
+        import subprocess  # nosec B404 - Controlled subprocess for openssl CLI
 
-            logger.info("P12 certificate extracted successfully")
-            return str(cert_path), str(key_path)
+        common_args = [
+            "-passin",
+            f"pass:{self.p12_password or ''}",
+            "-legacy",  # Support legacy algorithms like RC2-40-CBC (OpenSSL 3.x)
+        ]
+        commands = [
+            # Extract certificate
+            ["openssl", "pkcs12", "-in", self.p12_cert_path, "-clcerts", "-nokeys"]
+            + ["-out", str(cert_path), *common_args],
+            # Extract private key
+            ["openssl", "pkcs12", "-in", self.p12_cert_path, "-nocerts", "-nodes"]
+            + ["-out", str(key_path), *common_args],
+        ]
 
-        except subprocess.CalledProcessError as e:
-            raise AuthenticationError(f"Failed to extract P12 certificate: {e.stderr}") from e
+        try:
+            # The two extractions are independent, so run them concurrently
+            processes = [
+                subprocess.Popen(  # nosec B603 B607 - Controlled openssl execution with user cert file
+                    command,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                )
+                for command in commands
+            ]
         except FileNotFoundError as e:
             raise AuthenticationError(
                 "openssl command not found - ensure OpenSSL is installed"
             ) from e
 
+        # Wait for both before checking so no child is left running
+        errors = [process.communicate()[1] for process in processes]
+        for process, stderr in zip(processes, errors):
+            if process.returncode != 0:
+                raise AuthenticationError(
+                    f"Failed to extract P12 certificate: {stderr.decode('utf-8', 'replace')}"
+                )
+
     def _make_request(self, endpoint: str, namespace: str = "system") -> dict:
         """
         Make authenticated request to F5 XC API.
 
         Args:
-            endpoint: API endpoint path (may contain {namespace} placeholder)
+            endpoint: API endpoint path, relative to the tenant API base URL
             namespace: F5 XC namespace (default: system)
 
         Returns:
@@ -220,23 +316,25 @@ class F5XCCollector:
         Raises:
             F5XCAPIError: If API request fails
         """
-        # Replace {namespace} placeholder in endpoint with actual namespace value
-        endpoint = endpoint.replace("{namespace}", namespace)
         url = f"{self.base_url}/{endpoint}"
-        params = {"namespace": namespace}
 
         try:
-            logger.debug("Making F5 XC API request", url=url, namespace=namespace)
-            response = self.session.get(url, params=params, timeout=30)
+            self.log.debug("Making F5 XC API request", url=url, namespace=namespace)
+            response = self.session.get(url, params=_namespace_params(namespace))
             response.raise_for_status()
-            return response.json()
+            # Parse the raw bytes directly (no intermediate decoded str copy)
+            data: dict = orjson.loads(response.content)
+            return data
 
         except requests.exceptions.HTTPError as e:
-            logger.error("F5 XC API HTTP error", status=e.response.status_code, error=str(e))
+            self.log.error("F5 XC API HTTP error", status=e.response.status_code, error=str(e))
             raise F5XCAPIError(f"F5 XC API request failed: {e}") from e
         except requests.exceptions.RequestException as e:
-            logger.error("F5 XC API request error", error=str(e))
+            self.log.error("F5 XC API request error", error=str(e))
             raise F5XCAPIError(f"F5 XC API request error: {e}") from e
+        except orjson.JSONDecodeError as e:
+            self.log.error("F5 XC API returned invalid JSON", url=url, error=str(e))
+            raise F5XCAPIError(f"Invalid JSON in F5 XC API response: {e}") from e
 
     def collect_resources(self, namespace: str = "system") -> list[F5XCResource]:
         """
@@ -251,142 +349,182 @@ class F5XCCollector:
         Raises:
             F5XCAPIError: If collection fails
         """
-        logger.info("Collecting F5 XC resources", namespace=namespace)
+        self.log.info("Collecting F5 XC resources", namespace=namespace)
 
         try:
-            resources = []
+            # The four endpoints are independent and I/O-bound, so query them
+            # concurrently over the shared session; each collector already logs
+            # and returns [] on its own failure
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                futures = [
+                    executor.submit(self.collect_http_loadbalancers, namespace),
+                    executor.submit(self.collect_origin_pools, namespace),
+                    executor.submit(self.collect_virtual_sites, namespace),
+                    executor.submit(self.collect_sites),
+                ]
+
+                # Consume in submission order so the result order stays stable
+                resources = []
+                for future in futures:
+                    resources.extend(future.result())
+
+            self.log.info("F5 XC resources collected", count=len(resources), namespace=namespace)
+            return resources
+
+        except Exception as e:
+            self.log.error("Failed to collect F5 XC resources", error=str(e))
+            raise F5XCAPIError(f"Failed to collect F5 XC resources: {e}") from e
+
+    async def collect_resources_async(self, namespace: str = "system") -> list[F5XCResource]:
+        """
+        Collect all F5 XC resources from an asyncio event loop.
 
-            # Collect HTTP load balancers
-            resources.extend(self.collect_http_loadbalancers(namespace))
+        Runs the blocking collectors in worker threads and gathers them, so async
+        callers can overlap F5 XC collection with other I/O without blocking the loop.
 
-            # Collect origin pools
-            resources.extend(self.collect_origin_pools(namespace))
+        Args:
+            namespace: F5 XC namespace to query (default: system)
 
-            # Collect virtual sites
-            resources.extend(self.collect_virtual_sites(namespace))
+        Returns:
+            List of F5 XC resources
 
-            # Collect sites
-            resources.extend(self.collect_sites())
+        Raises:
+            F5XCAPIError: If collection fails
+        """
+        self.log.info("Collecting F5 XC resources", namespace=namespace)
+
+        try:
+            results = await asyncio.gather(
+                asyncio.to_thread(self.collect_http_loadbalancers, namespace),
+                asyncio.to_thread(self.collect_origin_pools, namespace),
+                asyncio.to_thread(self.collect_virtual_sites, namespace),
+                asyncio.to_thread(self.collect_sites),
+            )
+            resources = [resource for result in results for resource in result]
 
-            logger.info("F5 XC resources collected", count=len(resources), namespace=namespace)
+            self.log.info("F5 XC resources collected", count=len(resources), namespace=namespace)
             return resources
 
         except Exception as e:
-            logger.error("Failed to collect F5 XC resources", error=str(e))
+            self.log.error("Failed to collect F5 XC resources", error=str(e))
             raise F5XCAPIError(f"Failed to collect F5 XC resources: {e}") from e
 
-    def collect_http_loadbalancers(self, namespace: str = "system") -> list[F5XCResource]:
+    def collect_all_namespaces(self, namespaces: list[str]) -> list[F5XCResource]:
         """
-        Collect HTTP load balancers.
+        Collect all F5 XC resources from several namespaces in parallel.
+
+        Every (namespace, kind) request is submitted at once over the shared session.
+        Sites are tenant-wide, so they are collected a single time.
 
         Args:
-            namespace: F5 XC namespace
+            namespaces: F5 XC namespaces to query
 
         Returns:
-            List of HTTP load balancer resources
-        """
-        logger.info("Collecting HTTP load balancers", namespace=namespace)
-
-        try:
-            response = self._make_request(
-                "config/namespaces/{namespace}/http_loadbalancers", namespace
-            )
-            items = response.get("items", [])
+            List of F5 XC resources, ordered by namespace then resource kind
 
-            resources = []
-            for item in items:
-                metadata = item.get("metadata", {})
-                spec = item.get("spec", {})
+        Raises:
+            F5XCAPIError: If collection fails
+        """
+        namespaces = list(dict.fromkeys(namespaces))
+        self.log.info("Collecting F5 XC resources", namespaces=namespaces)
 
-                resource = F5XCResource(
-                    type="http_loadbalancer",
-                    namespace=namespace,
-                    name=metadata.get("name", "unknown"),
-                    spec=spec,
-                    metadata=metadata,
-                )
-                resources.append(resource)
-                logger.debug("Collected HTTP load balancer", name=resource.name)
+        requests_to_make = [
+            (kind, namespace) for namespace in namespaces for kind in _ENDPOINTS if kind != "site"
+        ]
+        requests_to_make.append(("site", "system"))
 
+        try:
+            with ThreadPoolExecutor(max_workers=min(16, len(requests_to_make))) as executor:
+                futures = [
+                    executor.submit(self._collect, kind, namespace)
+                    for kind, namespace in requests_to_make
+                ]
+
+                # Consume in submission order so the result order stays stable
+                resources = []
+                for future in futures:
+                    resources.extend(future.result())
+
+            self.log.info("F5 XC resources collected", count=len(resources), namespaces=namespaces)
             return resources
 
         except Exception as e:
-            logger.warning("Failed to collect HTTP load balancers", error=str(e))
-            return []
+            self.log.error("Failed to collect F5 XC resources", error=str(e))
+            raise F5XCAPIError(f"Failed to collect F5 XC resources: {e}") from e
 
-    def collect_origin_pools(self, namespace: str = "system") -> list[F5XCResource]:
+    def _collect(self, kind: str, namespace: str) -> list[F5XCResource]:
         """
-        Collect origin pools.
+        Collect all resources of one kind from a namespace.
 
         Args:
+            kind: Resource kind, a key of _ENDPOINTS (e.g. "origin_pool")
             namespace: F5 XC namespace
 
         Returns:
-            List of origin pool resources
+            List of resources, or an empty list if collection fails
         """
-        logger.info("Collecting origin pools", namespace=namespace)
+        self.log.info("Collecting F5 XC resource kind", kind=kind, namespace=namespace)
 
         try:
-            response = self._make_request("config/namespaces/{namespace}/origin_pools", namespace)
-            items = response.get("items", [])
-
-            resources = []
-            for item in items:
-                metadata = item.get("metadata", {})
-                spec = item.get("spec", {})
-
-                resource = F5XCResource(
-                    type="origin_pool",
+            response = self._make_request(_ENDPOINTS[kind] % namespace, namespace)
+            spec_fields = _SPEC_FIELDS[kind]
+
+            # One pass over the items; per-item debug logging is dropped since
+            # structlog builds the event kwargs even when the level is filtered
+            resources = [
+                F5XCResource(
+                    type=kind,
                     namespace=namespace,
                     name=metadata.get("name", "unknown"),
-                    spec=spec,
+                    spec={key: spec[key] for key in spec_fields if key in spec},
                     metadata=metadata,
                 )
-                resources.append(resource)
-                logger.debug("Collected origin pool", name=resource.name)
+                for item in response.get("items", ())
+                for metadata, spec in ((item.get("metadata", {}), item.get("spec", {})),)
+            ]
+            self.log.debug("Collected F5 XC resources", kind=kind, count=len(resources))
 
             return resources
 
         except Exception as e:
-            logger.warning("Failed to collect origin pools", error=str(e))
+            self.log.warning("Failed to collect F5 XC resource kind", kind=kind, error=str(e))
             return []
 
-    def collect_virtual_sites(self, namespace: str = "system") -> list[F5XCResource]:
+    def collect_http_loadbalancers(self, namespace: str = "system") -> list[F5XCResource]:
         """
-        Collect virtual sites.
+        Collect HTTP load balancers.
 
         Args:
             namespace: F5 XC namespace
 
         Returns:
-            List of virtual site resources
+            List of HTTP load balancer resources
         """
-        logger.info("Collecting virtual sites", namespace=namespace)
+        return self._collect("http_loadbalancer", namespace)
 
-        try:
-            response = self._make_request("config/namespaces/{namespace}/virtual_sites", namespace)
-            items = response.get("items", [])
+    def collect_origin_pools(self, namespace: str = "system") -> list[F5XCResource]:
+        """
+        Collect origin pools.
 
-            resources = []
-            for item in items:
-                metadata = item.get("metadata", {})
-                spec = item.get("spec", {})
+        Args:
+            namespace: F5 XC namespace
 
-                resource = F5XCResource(
-                    type="virtual_site",
-                    namespace=namespace,
-                    name=metadata.get("name", "unknown"),
-                    spec=spec,
-                    metadata=metadata,
-                )
-                resources.append(resource)
-                logger.debug("Collected virtual site", name=resource.name)
+        Returns:
+            List of origin pool resources
+        """
+        return self._collect("origin_pool", namespace)
 
-            return resources
+    def collect_virtual_sites(self, namespace: str = "system") -> list[F5XCResource]:
+        """
+        Collect virtual sites.
 
-        except Exception as e:
-            logger.warning("Failed to collect virtual sites", error=str(e))
-            return []
+        Args:
+            namespace: F5 XC namespace
+
+        Returns:
+            List of virtual site resources
+        """
+        return self._collect("virtual_site", namespace)
 
     def collect_sites(self) -> list[F5XCResource]:
         """
@@ -395,29 +533,5 @@ class F5XCCollector:
         Returns:
             List of site resources
         """
-        logger.info("Collecting sites")
-
-        try:
-            response = self._make_request("config/namespaces/system/sites", "system")
-            items = response.get("items", [])
-
-            resources = []
-            for item in items:
-                metadata = item.get("metadata", {})
-                spec = item.get("spec", {})
-
-                resource = F5XCResource(
-                    type="site",
-                    namespace="system",
-                    name=metadata.get("name", "unknown"),
-                    spec=spec,
-                    metadata=metadata,
-                )
-                resources.append(resource)
-                logger.debug("Collected site", name=resource.name)
-
-            return resources
-
-        except Exception as e:
-            logger.warning("Failed to collect sites", error=str(e))
-            return []
+        # Sites are tenant-wide and only live in the system namespace
+        return self._collect("site", "system")
@@ -4,16 +4,19 @@ Lucidchart OAuth 2.0 authentication client.
 Handles OAuth flow, token management, and refresh logic.
 """
 
-import http.server
-import json
+import html
+import os
 import secrets
-import socketserver
+import socket
+import threading
+import time
 import urllib.parse
-import webbrowser
 from pathlib import Path
 from typing import Optional
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 
 from diagram_generator.exceptions import AuthenticationError
 from diagram_generator.utils import get_logger
@@ -29,6 +32,14 @@ class LucidAuthClient:
         "https://api.lucid.co/oauth2/token"  # nosec B105 - Public API endpoint URL, not password
     )
     TOKEN_CACHE_FILE = Path.home() / ".lucid_token_cache.json"
+    # Refresh this many seconds before the access token actually expires
+    TOKEN_EXPIRY_SKEW = 300
+    # Seconds to wait for the user to finish authorizing in the browser
+    CALLBACK_TIMEOUT = 300
+    # Seconds to wait for a callback connection to send its request line
+    CALLBACK_READ_TIMEOUT = 10
+    # Keep-alive connections kept for api.lucid.co / lucid.app; grown by ensure_pool_size()
+    POOL_MAXSIZE = 8
 
     def __init__(
         self,
@@ -49,6 +60,23 @@ class LucidAuthClient:
         self.redirect_uri = redirect_uri
         self.access_token: Optional[str] = None
         self.refresh_token: Optional[str] = None
+        # Wall-clock expiry (epoch seconds) so it stays meaningful in the token cache
+        self.expires_at: Optional[float] = None
+        # (access_token, header) so the header is only rebuilt when the token changes
+        self._auth_header_cache: Optional[tuple[str, dict[str, str]]] = None
+
+        # Single-flight refresh: concurrent callers that saw the same expired token
+        # wait on the lock and reuse the first caller's result
+        self._refresh_lock = threading.Lock()
+        self._refresh_epoch = 0
+
+        # One keep-alive session for token and API calls, so validate -> refresh ->
+        # upload reuse TLS connections (shared with LucidDiagramGenerator)
+        self.session = requests.Session()
+        self._pool_maxsize = self.POOL_MAXSIZE
+        self.session.mount(
+            "https://", HTTPAdapter(pool_connections=4, pool_maxsize=self._pool_maxsize)
+        )
 
         logger.info("Lucid OAuth client initialized", redirect_uri=redirect_uri)
 
@@ -106,6 +134,9 @@ class LucidAuthClient:
         Raises:
             AuthenticationError: If authorization fails
         """
+        # Only needed for the interactive flow, not the cached-token path
+        import webbrowser
+
         # Build authorization URL
         auth_params = {
             "client_id": self.client_id,
@@ -116,60 +147,63 @@ class LucidAuthClient:
         }
         auth_url = f"{self.AUTH_URL}?{urllib.parse.urlencode(auth_params)}"
 
-        # Open browser for user authorization
-        logger.info("Opening browser for authorization")
-        webbrowser.open(auth_url)
-
-        # Start local server to receive callback
-        callback_data = {}
-
-        class CallbackHandler(http.server.BaseHTTPRequestHandler):
-            def do_GET(self):
-                # Parse query parameters
-                query = urllib.parse.urlparse(self.path).query
-                params = urllib.parse.parse_qs(query)
-
-                # Store callback data
-                callback_data["code"] = params.get("code", [None])[0]
-                callback_data["state"] = params.get("state", [None])[0]
-                callback_data["error"] = params.get("error", [None])[0]
-
-                # Send response
-                self.send_response(200)
-                self.send_header("Content-type", "text/html")
-                self.end_headers()
-
-                if callback_data["code"]:
-                    html = "<html><body><h1>Authentication successful!</h1><p>You can close this window.</p></body></html>"
-                else:
-                    html = f"<html><body><h1>Authentication failed!</h1><p>Error: {callback_data['error']}</p></body></html>"
-
-                self.wfile.write(html.encode())
-
-            def log_message(self, format, *args):
-                # Suppress logging
-                pass
-
         # Parse port from redirect URI
         parsed = urllib.parse.urlparse(self.redirect_uri)
         port = parsed.port or 8080
 
-        # Start server
-        with socketserver.TCPServer(("", port), CallbackHandler) as httpd:
-            logger.info(f"Waiting for OAuth callback on port {port}")
-            httpd.handle_request()
-
-        # Validate response
-        if callback_data.get("error"):
-            raise AuthenticationError(f"OAuth authorization failed: {callback_data['error']}")
+        # The callback is a single GET, so read request lines off a plain loopback
+        # socket rather than running a full HTTP server. Browsers may open speculative
+        # or unrelated connections (preconnect, favicon), so keep accepting until a
+        # request carries this flow's state and a code or error
+        deadline = time.monotonic() + self.CALLBACK_TIMEOUT
+        with socket.create_server(("127.0.0.1", port)) as server:
+            # Open browser for user authorization once the callback port is listening
+            logger.info("Opening browser for authorization")
+            webbrowser.open(auth_url)
 
-        if not callback_data.get("code"):
-            raise AuthenticationError("No authorization code received")
-
-        if callback_data.get("state") != state:
-            raise AuthenticationError("State mismatch - possible CSRF attack")
-
-        return callback_data["code"]
+            logger.info(f"Waiting for OAuth callback on port {port}")
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise AuthenticationError("Timed out waiting for OAuth callback")
+                server.settimeout(remaining)
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    continue
+
+                with conn:
+                    conn.settimeout(self.CALLBACK_READ_TIMEOUT)
+                    try:
+                        params = _read_callback_params(conn)
+                    except OSError as e:
+                        logger.debug("Ignoring unreadable OAuth callback connection", error=str(e))
+                        continue
+
+                    code = params.get("code", [None])[0]
+                    error = params.get("error", [None])[0]
+                    if not (code or error):
+                        _send_html(conn, "404 Not Found", "<html><body></body></html>")
+                        continue
+                    if params.get("state", [None])[0] != state:
+                        logger.warning("Ignoring OAuth callback with mismatched state")
+                        _send_html(conn, "400 Bad Request", "<html><body></body></html>")
+                        continue
+
+                    if code:
+                        _send_html(
+                            conn,
+                            "200 OK",
+                            "<html><body><h1>Authentication successful!</h1><p>You can close this window.</p></body></html>",
+                        )
+                        return code
+
+                    _send_html(
+                        conn,
+                        "200 OK",
+                        f"<html><body><h1>Authentication failed!</h1><p>Error: {html.escape(error or '')}</p></body></html>",
+                    )
+                    raise AuthenticationError(f"OAuth authorization failed: {error}")
 
     def _exchange_code_for_tokens(self, auth_code: str) -> None:
         """
@@ -190,25 +224,56 @@ class LucidAuthClient:
         }
 
         try:
-            response = requests.post(self.TOKEN_URL, data=token_data, timeout=30)
+            response = self.session.post(self.TOKEN_URL, data=token_data, timeout=30)
             response.raise_for_status()
 
-            tokens = response.json()
-            self.access_token = tokens.get("access_token")
-            self.refresh_token = tokens.get("refresh_token")
-
-            if not self.access_token:
+            tokens = orjson.loads(response.content)
+            access_token = tokens.get("access_token")
+            if not access_token:
                 raise AuthenticationError("No access token in response")
 
+            # A new login supersedes any token a waiting refresh caller observed
+            with self._refresh_lock:
+                self.access_token = access_token
+                self.refresh_token = tokens.get("refresh_token")
+                self.expires_at = time.time() + tokens.get("expires_in", 3600)
+                self._refresh_epoch += 1
+
             logger.info("Tokens obtained successfully")
 
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
             raise AuthenticationError(f"Token exchange failed: {e}") from e
 
-    def refresh_access_token(self) -> str:
+    @property
+    def refresh_epoch(self) -> int:
+        """Counter bumped each time a new access token is obtained (login or refresh)."""
+        return self._refresh_epoch
+
+    def refresh_access_token(self, since_epoch: Optional[int] = None) -> str:
         """
         Refresh access token using refresh token.
 
+        Args:
+            since_epoch: refresh_epoch the caller observed when it last read the token;
+                if another caller has refreshed since, that token is returned as-is
+
+        Returns:
+            New access token
+
+        Raises:
+            AuthenticationError: If refresh fails
+        """
+        with self._refresh_lock:
+            # Reuse another caller's refresh only if it left a token; otherwise refresh here
+            if since_epoch is not None and since_epoch != self._refresh_epoch and self.access_token:
+                logger.debug("Access token already refreshed by another caller")
+                return self.access_token
+            return self._refresh_access_token()
+
+    def _refresh_access_token(self) -> str:
+        """
+        Exchange the refresh token for a new access token (caller holds the lock).
+
         Returns:
             New access token
 
@@ -228,11 +293,12 @@ class LucidAuthClient:
         }
 
         try:
-            response = requests.post(self.TOKEN_URL, data=token_data, timeout=30)
+            response = self.session.post(self.TOKEN_URL, data=token_data, timeout=30)
             response.raise_for_status()
 
-            tokens = response.json()
+            tokens = orjson.loads(response.content)
             self.access_token = tokens.get("access_token")
+            self.expires_at = time.time() + tokens.get("expires_in", 3600)
 
             # Update refresh token if provided
             if tokens.get("refresh_token"):
@@ -240,11 +306,12 @@ class LucidAuthClient:
 
             # Update cache
             self._cache_tokens()
+            self._refresh_epoch += 1
 
             logger.info("Access token refreshed successfully")
             return self.access_token
 
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
             logger.error("Token refresh failed", error=str(e))
             raise AuthenticationError(f"Token refresh failed: {e}") from e
 
@@ -254,9 +321,13 @@ class LucidAuthClient:
             cache_data = {
                 "access_token": self.access_token,
                 "refresh_token": self.refresh_token,
+                "expires_at": self.expires_at,
             }
 
-            self.TOKEN_CACHE_FILE.write_text(json.dumps(cache_data, indent=2))
+            # Write then rename so a crash mid-write never leaves a torn cache file
+            tmp_file = self.TOKEN_CACHE_FILE.with_suffix(".tmp")
+            tmp_file.write_bytes(orjson.dumps(cache_data, option=orjson.OPT_INDENT_2))
+            os.replace(tmp_file, self.TOKEN_CACHE_FILE)
             logger.debug("Tokens cached", cache_file=str(self.TOKEN_CACHE_FILE))
 
         except Exception as e:
@@ -273,15 +344,19 @@ class LucidAuthClient:
             if not self.TOKEN_CACHE_FILE.exists():
                 return False
 
-            cache_data = json.loads(self.TOKEN_CACHE_FILE.read_text())
+            cache_data = orjson.loads(self.TOKEN_CACHE_FILE.read_bytes())
             self.access_token = cache_data.get("access_token")
             self.refresh_token = cache_data.get("refresh_token")
+            self.expires_at = cache_data.get("expires_at")
 
             if not self.access_token:
                 return False
 
-            # Try to validate token by making test API call
-            if self._validate_token():
+            # Trust a token whose recorded expiry is still ahead; the upload path refreshes
+            # on 401 if it was revoked. Only caches without an expiry need a test call
+            if not self._token_expiring() and (
+                self.expires_at is not None or self._validate_token()
+            ):
                 return True
 
             # Token invalid, try refresh
@@ -307,7 +382,7 @@ class LucidAuthClient:
         """
         try:
             headers = {"Authorization": f"Bearer {self.access_token}"}
-            response = requests.get(
+            response = self.session.get(
                 "https://api.lucid.co/documents",
                 headers=headers,
                 timeout=10,
@@ -316,17 +391,119 @@ class LucidAuthClient:
         except Exception:
             return False
 
+    def ensure_pool_size(self, size: int) -> None:
+        """
+        Grow the shared session's connection pool to keep at least size connections.
+
+        Call before starting size concurrent requests so none of their keep-alive
+        connections are discarded with "Connection pool is full".
+
+        Args:
+            size: Number of concurrent requests the session must serve
+        """
+        if size <= self._pool_maxsize:
+            return
+        previous = self.session.get_adapter("https://")
+        self._pool_maxsize = size
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=size))
+        previous.close()
+        logger.debug("Lucid session connection pool resized", pool_maxsize=size)
+
     def get_auth_header(self) -> dict[str, str]:
         """
         Get authorization header for API requests.
 
+        The returned dict is shared between calls and must not be mutated.
+
         Returns:
             Dictionary with Authorization header
 
+        Raises:
+            AuthenticationError: If no valid token available
+        """
+        return self.get_auth_header_and_epoch()[0]
+
+    def get_auth_header_and_epoch(self) -> tuple[dict[str, str], int]:
+        """
+        Get authorization header together with the refresh_epoch of its token.
+
+        Pass the epoch to refresh_access_token(since_epoch=...) after a 401 so a token
+        another caller already refreshed is reused instead of exchanged again. The
+        returned dict is shared between calls and must not be mutated.
+
+        Returns:
+            Tuple of (Authorization header, refresh_epoch the token belongs to)
+
         Raises:
             AuthenticationError: If no valid token available
         """
         if not self.access_token:
             raise AuthenticationError("No access token available - authenticate first")
 
-        return {"Authorization": f"Bearer {self.access_token}"}
+        # Refresh ahead of expiry instead of waiting for a 401 on the next request
+        epoch = self._refresh_epoch
+        if self.refresh_token and self._token_expiring():
+            self.refresh_access_token(since_epoch=epoch)
+
+        # Token and epoch change together under the lock, so read them as a pair
+        with self._refresh_lock:
+            access_token, epoch = self.access_token, self._refresh_epoch
+        if not access_token:
+            raise AuthenticationError("No access token available - authenticate first")
+
+        if self._auth_header_cache is None or self._auth_header_cache[0] != access_token:
+            self._auth_header_cache = (
+                access_token,
+                {"Authorization": f"Bearer {access_token}"},
+            )
+        return self._auth_header_cache[1], epoch
+
+    def _token_expiring(self) -> bool:
+        """
+        Check whether the access token expires within TOKEN_EXPIRY_SKEW seconds.
+
+        Returns:
+            True if the token is known to be expired or about to expire
+        """
+        if self.expires_at is None:
+            return False
+        return time.time() >= self.expires_at - self.TOKEN_EXPIRY_SKEW
+
+
+def _read_callback_params(conn: socket.socket) -> dict[str, list[str]]:
+    """
+    Read an HTTP request line from a callback connection and parse its query.
+
+    Args:
+        conn: Accepted connection with a read timeout set
+
+    Returns:
+        Query parameters (empty if the connection sent no request line)
+
+    Raises:
+        OSError: If reading times out or the connection fails
+    """
+    # Request line: "GET /callback?code=...&state=... HTTP/1.1"
+    data = b""
+    while b"\r\n" not in data and len(data) < 8192:
+        chunk = conn.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    parts = data.split(b"\r\n", 1)[0].split(b" ")
+    path = parts[1].decode("latin-1") if len(parts) > 1 else ""
+    return urllib.parse.parse_qs(urllib.parse.urlparse(path).query)
+
+
+def _send_html(conn: socket.socket, status: str, page: str) -> None:
+    """Send a minimal HTML response and let the caller close the connection."""
+    body = page.encode()
+    try:
+        conn.sendall(
+            b"HTTP/1.1 %s\r\n"
+            b"Content-Type: text/html\r\n"
+            b"Content-Length: %d\r\n"
+            b"Connection: close\r\n\r\n" % (status.encode(), len(body)) + body
+        )
+    except OSError as e:
+        logger.debug("Failed to send OAuth callback response", error=str(e))
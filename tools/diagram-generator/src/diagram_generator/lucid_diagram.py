@@ -4,9 +4,14 @@ Lucidchart diagram generation and upload module.
 Converts correlated resources into Lucidchart diagrams with layout and grouping.
 """
 
+import itertools
 import uuid
-from typing import Any
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
 
+import orjson
 import requests
 
 from diagram_generator.exceptions import DiagramGenerationError, LucidAPIError
@@ -14,8 +19,7 @@ from diagram_generator.lucid_auth import LucidAuthClient
 from diagram_generator.models import (
     CorrelatedResources,
     LucidDocument,
-    LucidLine,
-    LucidShape,
+    RelationshipType,
     ResourceRelationship,
     ResourceSource,
 )
@@ -23,6 +27,57 @@ from diagram_generator.utils import format_resource_label, get_logger, get_resou
 
 logger = get_logger(__name__)
 
+# Upload body chunk size; large enough that chunked encoding adds little overhead
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def _iter_json_chunks(document_data: dict[str, Any]) -> Iterator[bytes]:
+    """
+    Serialize a Lucid document to JSON incrementally.
+
+    Page objects are encoded one at a time and flushed in UPLOAD_CHUNK_SIZE chunks,
+    so the full JSON body is never held in memory at once.
+
+    Args:
+        document_data: Document data structure
+
+    Yields:
+        Consecutive chunks of the JSON document
+    """
+    buffer = bytearray(b"{")
+    for i, (key, value) in enumerate(document_data.items()):
+        if i:
+            buffer += b","
+        buffer += orjson.dumps(key) + b":"
+        if key != "pages":
+            buffer += orjson.dumps(value)
+            continue
+
+        buffer += b"["
+        for j, page in enumerate(value):
+            buffer += b",{" if j else b"{"
+            for k, (page_key, page_value) in enumerate(page.items()):
+                if k:
+                    buffer += b","
+                buffer += orjson.dumps(page_key) + b":"
+                if page_key != "objects":
+                    buffer += orjson.dumps(page_value)
+                    continue
+
+                buffer += b"["
+                for n, obj in enumerate(page_value):
+                    if n:
+                        buffer += b","
+                    buffer += orjson.dumps(obj)
+                    if len(buffer) >= UPLOAD_CHUNK_SIZE:
+                        yield bytes(buffer)
+                        buffer.clear()
+                buffer += b"]"
+            buffer += b"}"
+        buffer += b"]"
+    buffer += b"}"
+    yield bytes(buffer)
+
 
 class LucidDiagramGenerator:
     """Generates and uploads Lucidchart diagrams from correlated resources."""
@@ -45,6 +100,14 @@ class LucidDiagramGenerator:
         "generic_dependency": "#95A5A6",
     }
 
+    # Upload attempts, including the retry after a 401 token refresh
+    UPLOAD_ATTEMPTS = 2
+
+    # Relationship labels ("terraform_dependency" -> "Terraform Dependency")
+    RELATIONSHIP_LABELS = {
+        rel_type.value: rel_type.value.replace("_", " ").title() for rel_type in RelationshipType
+    }
+
     def __init__(
         self,
         auth_client: LucidAuthClient,
@@ -65,7 +128,21 @@ class LucidDiagramGenerator:
         self.title = title
         self.auto_layout = auto_layout
         self.group_by_platform = group_by_platform
-        self.session = requests.Session()
+        # Share the auth client's keep-alive session with token operations
+        self.session = auth_client.session
+
+        # Object IDs only need to be unique within a document, so use one random
+        # prefix plus a counter instead of a uuid4 per shape and line
+        self._id_prefix = uuid.uuid4().hex
+        self._id_counter = itertools.count()
+
+        # One shared style dict per relationship type; line objects are serialized,
+        # never mutated, so every line of a type can reference the same dict
+        self._line_styles = {
+            rel_type: {"stroke": color, "strokeWidth": 2}
+            for rel_type, color in self.RELATIONSHIP_COLORS.items()
+        }
+        self._default_line_style = {"stroke": "#95A5A6", "strokeWidth": 2}
 
         logger.info(
             "Lucid diagram generator initialized",
@@ -73,12 +150,19 @@ class LucidDiagramGenerator:
             auto_layout=auto_layout,
         )
 
-    def generate_and_upload(self, correlated_resources: CorrelatedResources) -> LucidDocument:
+    def _next_id(self) -> str:
+        """Return a new document-unique object ID."""
+        return f"{self._id_prefix}-{next(self._id_counter)}"
+
+    def generate_and_upload(
+        self, correlated_resources: CorrelatedResources, title: Optional[str] = None
+    ) -> LucidDocument:
         """
         Generate diagram from correlated resources and upload to Lucidchart.
 
         Args:
             correlated_resources: Correlated infrastructure resources
+            title: Document title (default: the generator's title)
 
         Returns:
             LucidDocument with document ID and URL
@@ -99,7 +183,7 @@ class LucidDiagramGenerator:
             lines = self._generate_lines(correlated_resources.relationships, shapes)
 
             # Build document structure
-            document_data = self._build_document_data(shapes, lines)
+            document_data = self._build_document_data(shapes, lines, title)
 
             # Upload to Lucidchart
             document = self._upload_document(document_data)
@@ -111,15 +195,46 @@ class LucidDiagramGenerator:
             logger.error("Diagram generation failed", error=str(e))
             raise DiagramGenerationError(f"Failed to generate diagram: {e}") from e
 
-    def _generate_shapes(self, resources: list[dict[str, Any]]) -> dict[str, LucidShape]:
+    def generate_and_upload_batch(
+        self,
+        jobs: dict[str, CorrelatedResources],
+        max_workers: int = 8,
+    ) -> list[LucidDocument]:
+        """
+        Generate and upload several Lucidchart diagrams, overlapping the uploads.
+
+        Uploads are network-bound and independent, so they run in a thread pool
+        sharing the auth client's keep-alive session, whose connection pool is grown
+        to max_workers if needed.
+
+        Args:
+            jobs: Mapping of document title to the correlated resources to draw
+            max_workers: Maximum number of concurrent uploads
+
+        Returns:
+            LucidDocument for each job, in input order
+
+        Raises:
+            DiagramGenerationError: If any diagram fails to generate or upload
+        """
+        logger.info("Generating Lucid diagram batch", diagram_count=len(jobs))
+
+        self.auth_client.ensure_pool_size(max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.generate_and_upload, jobs.values(), jobs))
+
+    def _generate_shapes(self, resources: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
         """
         Generate Lucid shapes from resources.
 
+        Shapes are built directly in API format, so they go into the document
+        without an intermediate model layer.
+
         Args:
             resources: List of resource dictionaries
 
         Returns:
-            Dictionary mapping resource IDs to LucidShape objects
+            Dictionary mapping resource IDs to shape objects in Lucid API format
         """
         shapes = {}
         x_offset = 100
@@ -135,26 +250,27 @@ class LucidDiagramGenerator:
         else:
             grouped = {"all": resources}
 
-        group_index = 0
+        # Each group gets a fixed 1000px column, computed once up front
+        group_offsets = {name: x_offset + i * 1000 for i, name in enumerate(grouped)}
 
-        for _group_name, group_resources in grouped.items():
+        for group_name, group_resources in grouped.items():
+            x_base = group_offsets[group_name]
             for i, resource in enumerate(group_resources):
                 # Calculate position
-                row = i // 5
-                col = i % 5
-                x = x_offset + (group_index * 1000) + (col * x_spacing)
+                row, col = divmod(i, 5)
+                x = x_base + (col * x_spacing)
                 y = y_offset + (row * y_spacing)
 
                 # Get resource details
                 source = resource.get("source", "unknown")
                 resource_type = resource.get("type", "unknown")
-                name = get_resource_short_name(type("Resource", (), resource))
+                name = get_resource_short_name(resource)
 
                 # Create shape ID
                 if source == "terraform":
-                    shape_id = resource.get("address", str(uuid.uuid4()))
+                    shape_id = resource.get("address") or self._next_id()
                 elif source == "azure":
-                    shape_id = resource.get("id", str(uuid.uuid4()))
+                    shape_id = resource.get("id") or self._next_id()
                 else:  # f5xc
                     namespace = resource.get("namespace", "")
                     shape_id = f"{namespace}/{resource_type}/{name}"
@@ -163,22 +279,23 @@ class LucidDiagramGenerator:
                 label = format_resource_label(source, resource_type, name)
 
                 # Create shape
-                shape = LucidShape(
-                    id=shape_id,
-                    shape_type="rectangle",
-                    bounding_box={
+                shapes[shape_id] = {
+                    "id": shape_id,
+                    "type": "shape",
+                    "boundingBox": {
                         "x": x,
                         "y": y,
                         "width": shape_width,
                         "height": shape_height,
                     },
-                    text=label,
-                    fill_color=self.SOURCE_COLORS.get(source, "#CCCCCC"),
-                    stroke_color="#000000",
-                )
-                shapes[shape_id] = shape
-
-            group_index += 1
+                    "style": {
+                        "fill": self.SOURCE_COLORS.get(source, "#CCCCCC"),
+                        "stroke": "#000000",
+                    },
+                    "text": {
+                        "text": label,
+                    },
+                }
 
         logger.info("Generated shapes", count=len(shapes))
         return shapes
@@ -186,20 +303,21 @@ class LucidDiagramGenerator:
     def _generate_lines(
         self,
         relationships: list[ResourceRelationship],
-        shapes: dict[str, LucidShape],
-    ) -> list[LucidLine]:
+        shapes: dict[str, dict[str, Any]],
+    ) -> Iterator[dict[str, Any]]:
         """
         Generate Lucid connector lines from relationships.
 
+        Lines are yielded directly in API format, so no intermediate line objects
+        are kept alongside the document data.
+
         Args:
             relationships: List of ResourceRelationship objects
             shapes: Dictionary of shapes
 
-        Returns:
-            List of LucidLine objects
+        Yields:
+            Line objects in Lucid API format
         """
-        lines = []
-
         for relationship in relationships:
             source_id = relationship.source_id
             target_id = relationship.target_id
@@ -209,19 +327,17 @@ class LucidDiagramGenerator:
             if source_id not in shapes or target_id not in shapes:
                 continue
 
-            # Create line
-            line = LucidLine(
-                id=str(uuid.uuid4()),
-                source_shape_id=source_id,
-                target_shape_id=target_id,
-                stroke_color=self.RELATIONSHIP_COLORS.get(rel_type, "#95A5A6"),
-                stroke_width=2,
-                label=rel_type.replace("_", " ").title(),
-            )
-            lines.append(line)
-
-        logger.info("Generated connector lines", count=len(lines))
-        return lines
+            yield {
+                "id": self._next_id(),
+                "type": "line",
+                "endpoint1": {"id": source_id},
+                "endpoint2": {"id": target_id},
+                "style": self._line_styles.get(rel_type, self._default_line_style),
+                "text": {
+                    "text": self.RELATIONSHIP_LABELS.get(rel_type)
+                    or rel_type.replace("_", " ").title()
+                },
+            }
 
     def _group_resources_by_source(self, resources: list[dict[str, Any]]) -> dict[str, list[dict]]:
         """
@@ -233,76 +349,49 @@ class LucidDiagramGenerator:
         Returns:
             Dictionary mapping source to resources
         """
-        groups: dict[str, list[Any]] = {
-            "terraform": [],
-            "azure": [],
-            "f5xc": [],
-        }
-
+        groups: defaultdict[str, list[Any]] = defaultdict(list)
         for resource in resources:
-            source = resource.get("source", "unknown")
-            if source in groups:
-                groups[source].append(resource)
+            groups[resource.get("source", "unknown")].append(resource)
 
-        return groups
+        # Known sources keep their fixed columns (even when empty); resources from any
+        # other source follow instead of being dropped
+        ordered = {source: groups.pop(source, []) for source in ("terraform", "azure", "f5xc")}
+        ordered.update(groups)
+        return ordered
 
     def _build_document_data(
-        self, shapes: dict[str, LucidShape], lines: list[LucidLine]
+        self,
+        shapes: dict[str, dict[str, Any]],
+        lines: Iterable[dict[str, Any]],
+        title: Optional[str] = None,
     ) -> dict[str, Any]:
         """
         Build Lucidchart document data structure.
 
         Args:
-            shapes: Dictionary of shapes
-            lines: List of connector lines
+            shapes: Dictionary of shape objects in API format
+            lines: Connector line objects in API format
+            title: Document title (default: the generator's title)
 
         Returns:
             Document data for API upload
         """
-        # Convert shapes to API format
-        shape_objects = []
-        for shape in shapes.values():
-            shape_obj = {
-                "id": shape.id,
-                "type": "shape",
-                "boundingBox": shape.bounding_box,
-                "style": {
-                    "fill": shape.fill_color,
-                    "stroke": shape.stroke_color,
-                },
-                "text": {
-                    "text": shape.text,
-                },
-            }
-            shape_objects.append(shape_obj)
-
-        # Convert lines to API format
-        line_objects = []
-        for line in lines:
-            line_obj = {
-                "id": line.id,
-                "type": "line",
-                "endpoint1": {"id": line.source_shape_id},
-                "endpoint2": {"id": line.target_shape_id},
-                "style": {
-                    "stroke": line.stroke_color,
-                    "strokeWidth": line.stroke_width,
-                },
-            }
-            if line.label:
-                line_obj["text"] = {"text": line.label}
-            line_objects.append(line_obj)
+        # Shapes and lines are already in API format; chain them into one list
+        objects = list(shapes.values())
+        shape_count = len(objects)
+        objects.extend(lines)
+        logger.info("Generated connector lines", count=len(objects) - shape_count)
 
         # Build page
         page = {
-            "id": str(uuid.uuid4()),
+            "id": self._next_id(),
             "title": "Infrastructure",
-            "objects": shape_objects + line_objects,
+            "objects": objects,
         }
 
         # Build document
         document_data: dict[str, Any] = {
-            "title": self.title,
+            "title": title or self.title,
             "pages": [page],
         }
 
@@ -315,6 +404,8 @@ class LucidDiagramGenerator:
         """
         Upload document to Lucidchart.
 
+        A 401 refreshes the access token and retries, up to UPLOAD_ATTEMPTS in total.
+
         Args:
             document_data: Document data structure
 
@@ -325,50 +416,60 @@ class LucidDiagramGenerator:
             LucidAPIError: If upload fails
         """
         url = f"{self.LUCID_API_BASE}/documents"
-        headers = self.auth_client.get_auth_header()
-        headers["Content-Type"] = "application/json"
 
-        try:
-            logger.info("Uploading document to Lucidchart")
-            response = self.session.post(
-                url,
-                json=document_data,
-                headers=headers,
-                timeout=60,
-            )
-            response.raise_for_status()
-
-            result = response.json()
-            document_id = result.get("documentId")
-            document_url = result.get("url")
-
-            if not document_id:
-                raise LucidAPIError("No document ID in response")
-
-            document = LucidDocument(
-                document_id=document_id,
-                title=self.title,
-                url=document_url,
-            )
-
-            logger.info(
-                "Document uploaded successfully",
-                document_id=document_id,
-                url=document_url,
-            )
-            return document
+        for attempt in range(1, self.UPLOAD_ATTEMPTS + 1):
+            auth_header, refresh_epoch = self.auth_client.get_auth_header_and_epoch()
+            headers = {**auth_header, "Content-Type": "application/json"}
+
+            try:
+                logger.info("Uploading document to Lucidchart", attempt=attempt)
+                # Stream the body so the serialized JSON is never materialized in full
+                response = self.session.post(
+                    url,
+                    data=_iter_json_chunks(document_data),
+                    headers=headers,
+                    timeout=60,
+                )
+
+                # Tokens are refreshed ahead of expiry; this covers tokens revoked early
+                if response.status_code == 401 and attempt < self.UPLOAD_ATTEMPTS:
+                    logger.warning("Access token rejected, refreshing")
+                    # Skips the exchange if another upload already refreshed this token
+                    self.auth_client.refresh_access_token(since_epoch=refresh_epoch)
+                    continue
+
+                response.raise_for_status()
+
+                result = orjson.loads(response.content)
+                document_id = result.get("documentId")
+                document_url = result.get("url")
+
+                if not document_id:
+                    raise LucidAPIError("No document ID in response")
+
+                document = LucidDocument(
+                    document_id=document_id,
+                    title=document_data["title"],
+                    url=document_url,
+                )
+
+                logger.info(
+                    "Document uploaded successfully",
+                    document_id=document_id,
+                    url=document_url,
+                )
+                return document
+
+            except requests.exceptions.HTTPError as e:
+                logger.error("Document upload failed", status=e.response.status_code, error=str(e))
+                raise LucidAPIError(f"Document upload failed: {e}") from e
 
-        except requests.exceptions.HTTPError as e:
-            # Handle token expiration
-            if e.response.status_code == 401:
-                logger.warning("Access token expired, refreshing")
-                self.auth_client.refresh_access_token()
-                # Retry upload
-                return self._upload_document(document_data)
+            except requests.exceptions.RequestException as e:
+                logger.error("Document upload request failed", error=str(e))
+                raise LucidAPIError(f"Document upload request failed: {e}") from e
 
-            logger.error("Document upload failed", status=e.response.status_code, error=str(e))
-            raise LucidAPIError(f"Document upload failed: {e}") from e
+            except orjson.JSONDecodeError as e:
+                logger.error("Lucid API returned invalid JSON", error=str(e))
+                raise LucidAPIError(f"Invalid JSON in Lucid API response: {e}") from e
 
-        except requests.exceptions.RequestException as e:
-            logger.error("Document upload request failed", error=str(e))
-            raise LucidAPIError(f"Document upload request failed: {e}") from e
+        raise LucidAPIError(f"Document upload failed after {self.UPLOAD_ATTEMPTS} attempts")
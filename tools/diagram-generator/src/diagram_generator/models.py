@@ -2,14 +2,17 @@
 Data models for infrastructure resources and configuration.
 
 This module defines Pydantic models for type-safe data handling and validation
-across Terraform, Azure, and F5 XC resources.
+across Terraform, Azure, and F5 XC resources. Output-side containers that are only
+built by this package (Lucid shapes/lines, draw.io documents) are plain dataclasses.
 """
 
+from concurrent.futures import Future
+from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
 from typing import Any, Optional
 
-from pydantic import BaseModel, ConfigDict, Field, HttpUrl, field_validator, model_validator
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl, model_validator
 
 
 class ResourceSource(str, Enum):
@@ -57,12 +60,6 @@ class AzureResource(BaseModel):
     tags: dict[str, str] = Field(default_factory=dict)
     properties: dict[str, Any] = Field(default_factory=dict)
 
-    @field_validator("tags", "properties", mode="before")
-    @classmethod
-    def convert_none_to_dict(cls, value: Any) -> dict:
-        """Convert None values to empty dict for tags and properties."""
-        return value if value is not None else {}
-
 
 class F5XCResource(BaseModel):
     """F5 Distributed Cloud resource from REST API."""
@@ -126,7 +123,11 @@ class F5XCAuthMethod(str, Enum):
 class DiagramConfig(BaseModel):
     """Configuration for diagram generation."""
 
-    model_config = ConfigDict(validate_assignment=True, use_enum_values=False)
+    # Built once per CLI run and treated as read-only, so validate_f5xc_auth runs exactly
+    # once at construction rather than again on every attribute assignment.
+    # defer_build: the schema is only built when a config is first constructed, not on
+    # every `import diagram_generator`
+    model_config = ConfigDict(use_enum_values=False, defer_build=True)
 
     # Terraform configuration
     terraform_state_path: Optional[str] = Field(
@@ -181,7 +182,8 @@ class DiagramConfig(BaseModel):
         return self
 
 
-class LucidShape(BaseModel):
+@dataclass
+class LucidShape:
     """Lucidchart shape definition."""
 
     id: str
@@ -192,7 +194,8 @@ class LucidShape(BaseModel):
     stroke_color: str = "#000000"
 
 
-class LucidLine(BaseModel):
+@dataclass
+class LucidLine:
     """Lucidchart line (connector) definition."""
 
     id: str
@@ -212,9 +215,30 @@ class LucidDocument(BaseModel):
     url: Optional[HttpUrl] = None
 
 
-class DrawioDocument(BaseModel):
+@dataclass
+class DrawioDocument:
     """Draw.io document structure."""
 
     file_path: Path
     image_file_path: Path
     title: str
+
+    # Pending background export of image_file_path; None when the image is already written
+    image_export: Optional[Future] = field(default=None, repr=False, compare=False)
+
+    def wait_for_image(self, timeout: Optional[float] = None) -> Path:
+        """
+        Block until the background image export has finished.
+
+        Args:
+            timeout: Maximum seconds to wait (waits indefinitely if None)
+
+        Returns:
+            Path to the exported image file
+
+        Raises:
+            DiagramGenerationError: If the export failed
+        """
+        if self.image_export is not None:
+            self.image_export.result(timeout=timeout)
+        return self.image_file_path
@@ -4,18 +4,39 @@ Terraform state collection module.
 Extracts resources and dependencies from Terraform state files.
 """
 
-import json
+import os
 import subprocess  # nosec B404 - Controlled subprocess usage for terraform CLI
+from collections.abc import Iterator
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
+
+import orjson
 
 from diagram_generator.exceptions import TerraformStateError
-from diagram_generator.models import TerraformResource
+from diagram_generator.models import ResourceSource, TerraformResource
 from diagram_generator.utils import get_logger, retry_on_exception
 
 logger = get_logger(__name__)
 
 
+def _walk_resources(state_data: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """
+    Iterate raw resource dicts from the root module and all nested child modules.
+
+    Args:
+        state_data: Terraform state as dictionary
+
+    Yields:
+        Resource dicts as emitted by terraform show -json, root module first
+    """
+    stack = [state_data.get("values", {}).get("root_module", {})]
+    while stack:
+        module = stack.pop()
+        yield from module.get("resources", []) or []
+        # Reversed so modules are visited in the order Terraform lists them
+        stack.extend(reversed(module.get("child_modules", []) or []))
+
+
 class TerraformStateCollector:
     """Collects and parses Terraform state data."""
 
@@ -27,7 +48,13 @@ class TerraformStateCollector:
             state_path: Path to Terraform directory (uses current directory if None)
         """
         self.state_path = Path(state_path) if state_path else Path.cwd()
-        logger.info("Terraform collector initialized", path=str(self.state_path))
+        # Converted once; used as the terraform working directory and in logs
+        self._cwd = os.fspath(self.state_path)
+        # Parsed state and resources keyed by (state file, mtime), so repeated calls such as
+        # collect_resources() followed by extract_resource_groups() run terraform only once
+        self._state_cache: Optional[tuple[tuple[Path, int], dict]] = None
+        self._resources_cache: Optional[tuple[tuple[Path, int], list[TerraformResource]]] = None
+        logger.info("Terraform collector initialized", path=self._cwd)
 
     @retry_on_exception(max_attempts=2, delay=1.0, exceptions=(subprocess.SubprocessError,))
     def collect_resources(self) -> list[TerraformResource]:
@@ -43,10 +70,17 @@ class TerraformStateCollector:
         logger.info("Collecting Terraform state")
 
         try:
+            key = self._state_key()
+            if key is not None and self._resources_cache and self._resources_cache[0] == key:
+                logger.debug("Using cached Terraform resources")
+                return list(self._resources_cache[1])
+
             state_data = self._get_terraform_state()
             resources = self._parse_resources(state_data)
+            if key is not None:
+                self._resources_cache = (key, resources)
             logger.info("Terraform resources collected", count=len(resources))
-            return resources
+            return list(resources)
 
         except Exception as e:
             logger.error("Failed to collect Terraform resources", error=str(e))
@@ -65,18 +99,18 @@ class TerraformStateCollector:
         logger.info("Extracting resource groups from Terraform state")
 
         try:
-            resources = self.collect_resources()
+            # Filter the raw state rows; only the name is needed, not TerraformResource objects
             resource_groups = []
 
-            for resource in resources:
-                if resource.type == "azurerm_resource_group":
-                    rg_name = resource.values.get("name")
+            for resource in _walk_resources(self._get_terraform_state()):
+                if resource.get("type") == "azurerm_resource_group":
+                    rg_name = (resource.get("values") or {}).get("name")
                     if rg_name:
                         resource_groups.append(rg_name)
                         logger.debug(
                             "Found resource group in Terraform",
                             resource_group=rg_name,
-                            address=resource.address,
+                            address=resource.get("address"),
                         )
 
             if not resource_groups:
@@ -91,32 +125,57 @@ class TerraformStateCollector:
             logger.error("Failed to extract resource groups", error=str(e))
             raise TerraformStateError(f"Failed to extract resource groups: {e}") from e
 
+    def _state_key(self) -> Optional[tuple[Path, int]]:
+        """
+        Identify the current local state file version.
+
+        Returns:
+            (state file path, mtime in ns), or None if there is no local terraform.tfstate
+            (e.g. remote backends), in which case nothing is cached
+        """
+        state_file = self.state_path / "terraform.tfstate"
+        try:
+            return state_file, state_file.stat().st_mtime_ns
+        except OSError:
+            return None
+
     def _get_terraform_state(self) -> dict:
         """
         Execute terraform show -json to get state.
 
+        The parsed output is reused while terraform.tfstate keeps the same mtime.
+
         Returns:
             Parsed state JSON
 
         Raises:
             TerraformStateError: If terraform command fails
         """
+        key = self._state_key()
+        if key is not None and self._state_cache and self._state_cache[0] == key:
+            logger.debug("Using cached Terraform state", state_file=str(key[0]))
+            return self._state_cache[1]
+
         try:
             result = (
                 subprocess.run(  # nosec B603 B607 - Controlled terraform execution with fixed args
                     ["terraform", "show", "-json"],
-                    cwd=self.state_path,
+                    cwd=self._cwd,
                     capture_output=True,
-                    text=True,
                     check=True,
                     timeout=60,
                 )
             )
-            return json.loads(result.stdout)
+            # Raw bytes straight into orjson, no intermediate str decode
+            state_data = orjson.loads(result.stdout)
+            if key is not None:
+                self._state_cache = (key, state_data)
+            return state_data
 
         except subprocess.CalledProcessError as e:
-            raise TerraformStateError(f"terraform show command failed: {e.stderr}") from e
-        except json.JSONDecodeError as e:
+            stderr = e.stderr.decode(errors="replace") if isinstance(e.stderr, bytes) else e.stderr
+            raise TerraformStateError(f"terraform show command failed: {stderr}") from e
+        except orjson.JSONDecodeError as e:
             raise TerraformStateError(f"Invalid JSON in Terraform state: {e}") from e
         except FileNotFoundError as e:
             raise TerraformStateError(
@@ -125,7 +184,10 @@ class TerraformStateCollector:
 
     def _parse_resources(self, state_data: dict) -> list[TerraformResource]:
         """
-        Parse resources from Terraform state JSON.
+        Parse resources from Terraform state JSON, including child modules.
+
+        Terraform produced this JSON itself, so rows are built with model_construct()
+        and skip Pydantic validation; TerraformResource has no custom validators.
 
         Args:
             state_data: Terraform state as dictionary
@@ -135,25 +197,17 @@ class TerraformStateCollector:
         """
         resources = []
 
-        root_module = state_data.get("values", {}).get("root_module", {})
-        resource_list = root_module.get("resources", [])
-
-        for resource in resource_list:
+        for resource in _walk_resources(state_data):
             try:
-                tf_resource = TerraformResource(
+                tf_resource = TerraformResource.model_construct(
+                    source=ResourceSource.TERRAFORM,
                     type=resource.get("type", "unknown"),
                     name=resource.get("name", "unnamed"),
                     address=resource.get("address", ""),
-                    values=resource.get("values", {}),
-                    depends_on=resource.get("depends_on", []),
+                    values=resource.get("values", {}) or {},
+                    depends_on=resource.get("depends_on", []) or [],
                 )
                 resources.append(tf_resource)
-                logger.debug(
-                    "Parsed Terraform resource",
-                    type=tf_resource.type,
-                    name=tf_resource.name,
-                    address=tf_resource.address,
-                )
 
             except Exception as e:
                 logger.warning(
@@ -163,4 +217,5 @@ class TerraformStateCollector:
                 )
                 continue
 
+        logger.debug("Parsed Terraform resources", total=len(resources))
         return resources
@@ -5,10 +5,15 @@ Provides structured logging, retry logic, and common helper functions.
 """
 
 import logging
+import re
+import sys
 import time
-from functools import wraps
-from typing import Any, Callable, TypeVar
+from collections.abc import Mapping
+from functools import lru_cache, wraps
+from typing import Any, Callable, Optional, TypeVar, Union
 
+import orjson
+import requests
 import structlog
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -18,11 +23,21 @@ from diagram_generator.exceptions import DiagramGeneratorError
 # Type variable for generic function decoration
 F = TypeVar("F", bound=Callable[..., Any])
 
+# IPv4 addresses in resource property strings; each octet is limited to 0-255 so
+# version strings or garbage like 999.999.999.999 are not reported
+_OCTET = r"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+_IP_PATTERN = re.compile(rf"\b(?:{_OCTET}\.){{3}}{_OCTET}\b")
+
+# Characters sanitize_resource_id() replaces with "_"
+_SANITIZE_TABLE = str.maketrans({".": "_", "[": "_", "]": "_", "/": "_"})
+
 
 def configure_logging(verbose: bool = False) -> None:
     """
     Configure structured logging for the application.
 
+    Logs are rendered for humans on a terminal and as JSON lines otherwise.
+
     Args:
         verbose: Enable debug-level logging if True
     """
@@ -33,22 +48,36 @@ def configure_logging(verbose: bool = False) -> None:
         level=log_level,
     )
 
+    processors: list[Any] = [
+        structlog.contextvars.merge_contextvars,
+        structlog.processors.add_log_level,
+        structlog.processors.TimeStamper(fmt="iso"),
+    ]
+    if verbose:
+        # Only needed for stack_info=True / bare exc_info debugging; logger.exception()
+        # already sets exc_info itself on the filtering bound logger
+        processors += [structlog.processors.StackInfoRenderer(), structlog.dev.set_exc_info]
+
+    if sys.stdout.isatty():
+        # Interactive use: human-readable colored output
+        processors.append(structlog.dev.ConsoleRenderer(colors=True))
+        logger_factory: Any = structlog.PrintLoggerFactory()
+    else:
+        # Pipelines/containers: one JSON object per line, serialized straight to bytes
+        processors.append(structlog.processors.format_exc_info)
+        processors.append(structlog.processors.JSONRenderer(serializer=orjson.dumps))
+        logger_factory = structlog.BytesLoggerFactory()
+
     structlog.configure(
-        processors=[
-            structlog.contextvars.merge_contextvars,
-            structlog.processors.add_log_level,
-            structlog.processors.StackInfoRenderer(),
-            structlog.dev.set_exc_info,
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.dev.ConsoleRenderer(colors=True),
-        ],
+        processors=processors,
         wrapper_class=structlog.make_filtering_bound_logger(log_level),
         context_class=dict,
-        logger_factory=structlog.PrintLoggerFactory(),
-        cache_logger_on_first_use=False,
+        logger_factory=logger_factory,
+        cache_logger_on_first_use=True,
     )
 
 
+@lru_cache(maxsize=256)
 def get_logger(name: str) -> structlog.BoundLogger:
     """
     Get a structured logger instance.
@@ -62,11 +91,37 @@ def get_logger(name: str) -> structlog.BoundLogger:
     return structlog.get_logger(name)
 
 
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to requests that do not set one."""
+
+    def __init__(self, *args: Any, timeout: Optional[float] = None, **kwargs: Any):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout: Union[None, float, tuple[float, float], tuple[float, None]] = None,
+        verify: Union[bool, str] = True,
+        cert: Union[None, bytes, str, tuple[Union[bytes, str], Union[bytes, str]]] = None,
+        proxies: Optional[Mapping[str, str]] = None,
+    ) -> requests.Response:
+        if timeout is None:
+            timeout = self.timeout
+        return super().send(
+            request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies
+        )
+
+
 def create_http_session_with_retries(
     retries: int = 3,
     backoff_factor: float = 0.3,
     status_forcelist: tuple[int, ...] = (500, 502, 503, 504),
-) -> Any:
+    pool_connections: int = 10,
+    pool_maxsize: int = 10,
+    timeout: Optional[float] = None,
+) -> requests.Session:
     """
     Create requests Session with automatic retry logic.
 
@@ -74,12 +129,13 @@ def create_http_session_with_retries(
         retries: Number of retry attempts
         backoff_factor: Backoff multiplier for retries
         status_forcelist: HTTP status codes to retry on
+        pool_connections: Number of per-host connection pools to cache
+        pool_maxsize: Keep-alive connections kept per host (size for concurrent callers)
+        timeout: Default timeout in seconds for requests that do not pass one
 
     Returns:
         Configured requests Session
     """
-    import requests
-
     session = requests.Session()
     retry = Retry(
         total=retries,
@@ -89,7 +145,12 @@ def create_http_session_with_retries(
         status_forcelist=status_forcelist,
         allowed_methods=["GET", "POST", "PUT"],
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = TimeoutHTTPAdapter(
+        timeout=timeout,
+        max_retries=retry,
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+    )
     session.mount("http://", adapter)
     session.mount("https://", adapter)
     return session
@@ -115,11 +176,14 @@ def retry_on_exception(
     """
 
     def decorator(func: F) -> F:
+        # Invariant per decorated function, so resolved once rather than on every call
+        logger = get_logger(func.__module__)
+        func_name = func.__name__
+        # Backoff schedule is fixed per decoration: delays[i] precedes attempt i + 2
+        delays = tuple(delay * backoff**i for i in range(max_attempts - 1))
+
         @wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
-            attempt_delay = delay
-            logger = get_logger(func.__module__)
-
             for attempt in range(1, max_attempts + 1):
                 try:
                     return func(*args, **kwargs)
@@ -127,7 +191,7 @@ def retry_on_exception(
                     if attempt == max_attempts:
                         logger.error(
                             "Function failed after max attempts",
-                            function=func.__name__,
+                            function=func_name,
                             attempts=max_attempts,
                             error=str(e),
                         )
@@ -135,16 +199,15 @@ def retry_on_exception(
 
                     logger.warning(
                         "Function failed, retrying",
-                        function=func.__name__,
+                        function=func_name,
                         attempt=attempt,
                         max_attempts=max_attempts,
-                        delay=attempt_delay,
+                        delay=delays[attempt - 1],
                         error=str(e),
                     )
-                    time.sleep(attempt_delay)
-                    attempt_delay *= backoff
+                    time.sleep(delays[attempt - 1])
 
-            raise DiagramGeneratorError(f"Unexpected state in retry logic for {func.__name__}")
+            raise DiagramGeneratorError(f"Unexpected state in retry logic for {func_name}")
 
         return wrapper  # type: ignore
 
@@ -163,7 +226,7 @@ def sanitize_resource_id(resource_id: str) -> str:
     Returns:
         Sanitized resource ID safe for use as node identifier
     """
-    return resource_id.replace(".", "_").replace("[", "_").replace("]", "_").replace("/", "_")
+    return resource_id.translate(_SANITIZE_TABLE)
 
 
 def get_resource_short_name(resource: Any) -> str:
@@ -171,17 +234,24 @@ def get_resource_short_name(resource: Any) -> str:
     Get a short, human-readable name for a resource.
 
     Args:
-        resource: Resource object (TerraformResource, AzureResource, or F5XCResource)
+        resource: Resource object (TerraformResource, AzureResource, or F5XCResource),
+            or its model_dump() dict
 
     Returns:
         Short name for display
     """
-    if hasattr(resource, "name"):
-        return resource.name
-    if hasattr(resource, "address"):
-        # For Terraform resources, extract name from address
-        parts = resource.address.split(".")
-        return parts[-1] if parts else "unknown"
+    if isinstance(resource, dict):
+        name = resource.get("name")
+        address = resource.get("address")
+    else:
+        name = getattr(resource, "name", None)
+        address = getattr(resource, "address", None)
+
+    if name is not None:
+        return name
+    if address:
+        # For Terraform resources, the name is the last segment of the address
+        return address.rpartition(".")[2] or "unknown"
     return "unknown"
 
 
@@ -198,48 +268,42 @@ def format_resource_label(source: str, resource_type: str, name: str, max_length
     Returns:
         Formatted label string
     """
-    label = f"{source.upper()}\n{resource_type}\n{name}"
+    source_label = source.upper()
 
-    if len(label) > max_length:
-        # Truncate name if too long
-        available_length = max_length - len(source) - len(resource_type) - 4
-        truncated_name = name[:available_length] + "..." if len(name) > available_length else name
-        label = f"{source.upper()}\n{resource_type}\n{truncated_name}"
+    # Length is known up front (two newline separators), so the label is built only once
+    if len(source_label) + len(resource_type) + len(name) + 2 <= max_length:
+        return f"{source_label}\n{resource_type}\n{name}"
 
-    return label
+    # Truncate name if too long
+    available_length = max_length - len(source) - len(resource_type) - 4
+    truncated_name = name[:available_length] + "..." if len(name) > available_length else name
+    return f"{source_label}\n{resource_type}\n{truncated_name}"
 
 
 def extract_ip_addresses(resource_dict: dict[str, Any]) -> list[str]:
     """
     Extract IP addresses from resource properties.
 
-    Recursively searches for IP-like values in nested dictionaries.
+    Walks nested dictionaries and lists iteratively, then searches all string values
+    in a single regex pass.
 
     Args:
         resource_dict: Resource properties dictionary
 
     Returns:
-        List of found IP addresses
-    """
-    import re
-
-    ip_pattern = re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b")
-    ips: list[str] = []
-
-    def search_dict(d: dict[str, Any]) -> None:
-        for _key, value in d.items():
-            if isinstance(value, str):
-                matches = ip_pattern.findall(value)
-                ips.extend(matches)
-            elif isinstance(value, dict):
-                search_dict(value)
-            elif isinstance(value, list):
-                for item in value:
-                    if isinstance(item, dict):
-                        search_dict(item)
-                    elif isinstance(item, str):
-                        matches = ip_pattern.findall(item)
-                        ips.extend(matches)
-
-    search_dict(resource_dict)
-    return list(set(ips))  # Remove duplicates
+        List of unique IP addresses found
+    """
+    strings: list[str] = []
+    stack: list[Any] = [resource_dict]
+
+    while stack:
+        value = stack.pop()
+        if isinstance(value, str):
+            strings.append(value)
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+
+    # Newline is a word boundary for _IP_PATTERN, so no match spans two values
+    return list(set(_IP_PATTERN.findall("\n".join(strings))))
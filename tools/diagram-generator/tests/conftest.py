@@ -2,16 +2,29 @@
 Pytest configuration and fixtures for diagram generator tests.
 """
 
-import json
 from pathlib import Path
-from typing import Any
-from unittest.mock import MagicMock, Mock
+from types import SimpleNamespace
+from typing import Any, Optional
+from unittest.mock import MagicMock, Mock, patch
 
+import orjson
 import pytest
-from diagram_generator.models import AzureResource, F5XCResource, TerraformResource
-
-
-@pytest.fixture
+import requests
+from azure.mgmt.resourcegraph import ResourceGraphClient
+from diagram_generator.azure_collector import AzureResourceGraphCollector
+from diagram_generator.f5xc_collector import F5XCCollector
+from diagram_generator.models import (
+    AzureResource,
+    F5XCAuthMethod,
+    F5XCResource,
+    TerraformResource,
+)
+
+# The mock_* and sample_* data fixtures below are session-scoped and shared by every test
+# that uses them: treat them as read-only and copy.deepcopy() before mutating
+
+
+@pytest.fixture(scope="session")
 def mock_terraform_state() -> dict[str, Any]:
     """Mock Terraform state JSON."""
     return {
@@ -49,7 +62,7 @@ def mock_terraform_state() -> dict[str, Any]:
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_azure_resources() -> list[dict[str, Any]]:
     """Mock Azure Resource Graph query results."""
     return [
@@ -90,7 +103,7 @@ def mock_azure_resources() -> list[dict[str, Any]]:
     ]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_f5xc_resources() -> dict[str, list[dict[str, Any]]]:
     """Mock F5 XC API response."""
     return {
@@ -115,7 +128,7 @@ def mock_f5xc_resources() -> dict[str, list[dict[str, Any]]]:
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_terraform_resources() -> list[TerraformResource]:
     """Sample TerraformResource objects."""
     return [
@@ -144,7 +157,7 @@ def sample_terraform_resources() -> list[TerraformResource]:
     ]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_azure_resources() -> list[AzureResource]:
     """Sample AzureResource objects."""
     return [
@@ -169,7 +182,7 @@ def sample_azure_resources() -> list[AzureResource]:
     ]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_f5xc_resources() -> list[F5XCResource]:
     """Sample F5XCResource objects."""
     return [
@@ -186,29 +199,95 @@ def sample_f5xc_resources() -> list[F5XCResource]:
     ]
 
 
+_VNET_ID = (
+    "/subscriptions/sub-123/resourceGroups/rg-test"
+    "/providers/Microsoft.Network/virtualNetworks/vnet-main"
+)
+
+# The make_* factories below use model_construct to skip validation; tests that need
+# validation to run should call the model constructors directly
+
+
+@pytest.fixture
+def make_tf_vnet():
+    """Factory for an unvalidated Terraform VNet resource with the given tags."""
+
+    def _make(tags: Optional[dict[str, str]] = None, **overrides: Any) -> TerraformResource:
+        fields = {
+            "type": "azurerm_virtual_network",
+            "name": "main",
+            "address": "azurerm_virtual_network.main",
+            "values": {"id": _VNET_ID, "tags": tags or {}},
+            "depends_on": [],
+        }
+        return TerraformResource.model_construct(**{**fields, **overrides})
+
+    return _make
+
+
+@pytest.fixture
+def make_azure_vnet():
+    """Factory for an unvalidated Azure VNet resource with the given tags."""
+
+    def _make(tags: Optional[dict[str, str]] = None, **overrides: Any) -> AzureResource:
+        fields = {
+            "id": _VNET_ID,
+            "name": "vnet-main",
+            "type": "Microsoft.Network/virtualNetworks",
+            "location": "eastus",
+            "resource_group": "rg-test",
+            "tags": tags or {},
+            "properties": {},
+        }
+        return AzureResource.model_construct(**{**fields, **overrides})
+
+    return _make
+
+
+@pytest.fixture
+def make_f5xc_pool():
+    """Factory for an unvalidated F5 XC origin pool resource."""
+
+    def _make(**overrides: Any) -> F5XCResource:
+        fields = {
+            "type": "origin_pool",
+            "namespace": "production",
+            "name": "pool-web",
+            "spec": {},
+            "metadata": {"name": "pool-web"},
+        }
+        return F5XCResource.model_construct(**{**fields, **overrides})
+
+    return _make
+
+
+# Serialized once; mock_terraform_command hands the same bytes to every subprocess.run call
+_MOCK_TF_STATE_JSON = orjson.dumps(
+    {
+        "values": {
+            "root_module": {
+                "resources": [
+                    {
+                        "type": "azurerm_resource_group",
+                        "name": "test",
+                        "address": "azurerm_resource_group.test",
+                        "values": {"name": "rg-test"},
+                        "depends_on": [],
+                    }
+                ]
+            }
+        }
+    }
+)
+
+
 @pytest.fixture
 def mock_terraform_command(monkeypatch):
     """Mock subprocess.run for terraform commands."""
 
     def mock_run(*args, **kwargs):
         mock_result = Mock()
-        mock_result.stdout = json.dumps(
-            {
-                "values": {
-                    "root_module": {
-                        "resources": [
-                            {
-                                "type": "azurerm_resource_group",
-                                "name": "test",
-                                "address": "azurerm_resource_group.test",
-                                "values": {"name": "rg-test"},
-                                "depends_on": [],
-                            }
-                        ]
-                    }
-                }
-            }
-        )
+        mock_result.stdout = _MOCK_TF_STATE_JSON
         mock_result.returncode = 0
         return mock_result
 
@@ -218,45 +297,91 @@ def mock_terraform_command(monkeypatch):
 @pytest.fixture
 def mock_azure_client(monkeypatch):
     """Mock Azure Resource Graph client."""
-    mock_client = MagicMock()
-    mock_response = Mock()
-    mock_response.data = [
-        {
-            "id": "/subscriptions/sub-123/resourceGroups/rg-test",
-            "name": "rg-test",
-            "type": "Microsoft.Resources/resourceGroups",
-            "location": "eastus",
-            "resourceGroup": "rg-test",
-            "tags": {},
-            "properties": {},
-        }
-    ]
-    mock_response.total_records = 1
-    mock_response.count = 1
+    mock_client = MagicMock(spec=ResourceGraphClient)
+    # Plain attribute bag; nothing asserts on the response object itself
+    mock_response = SimpleNamespace(
+        data=[
+            {
+                "id": "/subscriptions/sub-123/resourceGroups/rg-test",
+                "name": "rg-test",
+                "type": "Microsoft.Resources/resourceGroups",
+                "location": "eastus",
+                "resourceGroup": "rg-test",
+                "tags": {},
+                "properties": {},
+            }
+        ],
+        total_records=1,
+        count=1,
+    )
     mock_client.resources.return_value = mock_response
 
     return mock_client
 
 
 @pytest.fixture
-def mock_f5xc_session(monkeypatch):
-    """Mock requests session for F5 XC API."""
-    mock_session = MagicMock()
+def patched_azure_collector(mock_azure_client, monkeypatch):
+    """AzureResourceGraphCollector wired to mock_azure_client with CLI credentials stubbed."""
+    monkeypatch.setattr("diagram_generator.azure_collector.AzureCliCredential", Mock())
+    monkeypatch.setattr(
+        "diagram_generator.azure_collector.ResourceGraphClient",
+        lambda *args, **kwargs: mock_azure_client,
+    )
+    return AzureResourceGraphCollector(subscription_id="sub-123")
+
+
+@pytest.fixture(scope="module")
+def _token_collector_instance():
+    """API-token F5XCCollector built once per test module."""
+    # Only patch during construction; token_collector swaps in a fresh session per test
+    with patch("diagram_generator.f5xc_collector.create_http_session_with_retries"):
+        collector = F5XCCollector(
+            tenant="test-tenant",
+            auth_method=F5XCAuthMethod.API_TOKEN,
+            api_token="test-token",
+        )
+    return collector
+
+
+@pytest.fixture
+def token_collector(_token_collector_instance, monkeypatch):
+    """Shared API-token F5XCCollector with a fresh Mock session."""
+    monkeypatch.setattr(_token_collector_instance, "session", Mock())
+    return _token_collector_instance
+
+
+def _json_session(payload: Any, session: Any = None) -> Mock:
+    """Build a mock session whose get() returns payload as an orjson-encoded body."""
+    mock_session = session if session is not None else Mock()
     mock_response = Mock()
-    mock_response.json.return_value = {
-        "items": [
-            {
-                "metadata": {"name": "test-resource"},
-                "spec": {"test": "data"},
-            }
-        ]
-    }
-    mock_response.status_code = 200
+    mock_response.content = orjson.dumps(payload)
     mock_session.get.return_value = mock_response
-
     return mock_session
 
 
+@pytest.fixture
+def make_json_session():
+    """Factory for mock sessions whose get() returns the given JSON payload."""
+    return _json_session
+
+
+@pytest.fixture
+def mock_f5xc_session(monkeypatch):
+    """Mock requests session for F5 XC API."""
+    return _json_session(
+        {
+            "items": [
+                {
+                    "metadata": {"name": "test-resource"},
+                    "spec": {"test": "data"},
+                }
+            ]
+        },
+        # Spec from an instance: headers/cert are set in Session.__init__, not on the class
+        session=MagicMock(spec=requests.Session()),
+    )
+
+
 @pytest.fixture
 def mock_lucid_auth(monkeypatch):
     """Mock Lucidchart authentication."""
@@ -271,6 +396,9 @@ def mock_lucid_auth(monkeypatch):
         def get_auth_header(self):
             return {"Authorization": f"Bearer {self.access_token}"}
 
+        def get_auth_header_and_epoch(self):
+            return self.get_auth_header(), 0
+
     return MockLucidAuthClient
 
 
@@ -44,35 +44,21 @@ def test_azure_collector_auth_failure():
             )
 
 
-def test_collect_resources_success(mock_azure_client):
+def test_collect_resources_success(patched_azure_collector):
     """Test successful resource collection."""
-    with (
-        patch("diagram_generator.azure_collector.AzureCliCredential"),
-        patch("diagram_generator.azure_collector.ResourceGraphClient") as mock_client_class,
-    ):
-        mock_client_class.return_value = mock_azure_client
+    resources = patched_azure_collector.collect_resources()
 
-        collector = AzureResourceGraphCollector(subscription_id="sub-123")
-        resources = collector.collect_resources()
-
-        assert len(resources) == 1
-        assert resources[0].name == "rg-test"
-        assert resources[0].resource_group == "rg-test"
+    assert len(resources) == 1
+    assert resources[0].name == "rg-test"
+    assert resources[0].resource_group == "rg-test"
 
 
-def test_collect_resources_with_filter(mock_azure_client):
+def test_collect_resources_with_filter(patched_azure_collector, mock_azure_client):
     """Test resource collection with type filter."""
-    with (
-        patch("diagram_generator.azure_collector.AzureCliCredential"),
-        patch("diagram_generator.azure_collector.ResourceGraphClient") as mock_client_class,
-    ):
-        mock_client_class.return_value = mock_azure_client
-
-        collector = AzureResourceGraphCollector(subscription_id="sub-123")
-        collector.collect_resources(resource_types=["Microsoft.Network/virtualNetworks"])
+    patched_azure_collector.collect_resources(resource_types=["Microsoft.Network/virtualNetworks"])
 
-        # Verify query was built with filter
-        assert mock_azure_client.resources.called
+    # Verify query was built with filter
+    assert mock_azure_client.resources.called
 
 
 def test_collect_resources_api_error():
@@ -139,34 +125,20 @@ def test_extract_resource_group_invalid():
         assert rg == "unknown"
 
 
-def test_collect_network_resources(mock_azure_client):
+def test_collect_network_resources(patched_azure_collector):
     """Test network-specific resource collection."""
-    with (
-        patch("diagram_generator.azure_collector.AzureCliCredential"),
-        patch("diagram_generator.azure_collector.ResourceGraphClient") as mock_client_class,
-    ):
-        mock_client_class.return_value = mock_azure_client
-
-        collector = AzureResourceGraphCollector(subscription_id="sub-123")
-        resources = collector.collect_network_resources()
+    resources = patched_azure_collector.collect_network_resources()
 
-        # Verify it called collect_resources with network types
-        assert isinstance(resources, list)
+    # Verify it called collect_resources with network types
+    assert isinstance(resources, list)
 
 
-def test_collect_compute_resources(mock_azure_client):
+def test_collect_compute_resources(patched_azure_collector):
     """Test compute-specific resource collection."""
-    with (
-        patch("diagram_generator.azure_collector.AzureCliCredential"),
-        patch("diagram_generator.azure_collector.ResourceGraphClient") as mock_client_class,
-    ):
-        mock_client_class.return_value = mock_azure_client
-
-        collector = AzureResourceGraphCollector(subscription_id="sub-123")
-        resources = collector.collect_compute_resources()
+    resources = patched_azure_collector.collect_compute_resources()
 
-        # Verify it called collect_resources with compute types
-        assert isinstance(resources, list)
+    # Verify it called collect_resources with compute types
+    assert isinstance(resources, list)
 
 
 def test_parse_resources_with_missing_fields():
@@ -224,3 +196,24 @@ def test_retry_on_transient_error():
 
         assert len(resources) == 0
         assert mock_client.resources.call_count == 2  # Retry happened
+
+
+def test_parse_resources_null_tags_and_properties():
+    """Test that null tags/properties from Resource Graph become empty dicts."""
+    with patch("diagram_generator.azure_collector.AzureCliCredential"):
+        collector = AzureResourceGraphCollector(subscription_id="sub-123")
+        resources = collector._parse_resources(
+            {
+                "data": [
+                    {
+                        "id": "/subscriptions/sub-123/resourceGroups/rg-test/providers/Microsoft.Test/resources/test",
+                        "name": "test-resource",
+                        "tags": None,
+                        "properties": None,
+                    }
+                ]
+            }
+        )
+
+        assert resources[0].tags == {}
+        assert resources[0].properties == {}
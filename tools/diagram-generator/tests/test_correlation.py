@@ -2,8 +2,15 @@
 Tests for resource correlation engine.
 """
 
+from unittest.mock import patch
+
+from diagram_generator.azure_collector import AzureResourceGraphCollector
 from diagram_generator.correlation import ResourceCorrelator
-from diagram_generator.models import RelationshipType
+from diagram_generator.models import (
+    AzureResource,
+    RelationshipType,
+    TerraformResource,
+)
 
 
 def test_correlator_init():
@@ -89,9 +96,12 @@ def test_correlate_f5xc_to_azure_by_ip(sample_f5xc_resources, sample_azure_resou
 
 def test_drift_detection(sample_terraform_resources, sample_azure_resources):
     """Test configuration drift detection."""
-    # Modify Azure resource to create drift
-    azure_modified = sample_azure_resources.copy()
-    azure_modified[0].tags = {"environment": "production"}  # Different from Terraform
+    # Modified copy of the shared Azure resource to create drift
+    azure_modified = [
+        sample_azure_resources[0].model_copy(
+            update={"tags": {"environment": "production"}}  # Different from Terraform
+        )
+    ]
 
     correlator = ResourceCorrelator(enable_drift_detection=True)
     result = correlator.correlate(
@@ -105,34 +115,10 @@ def test_drift_detection(sample_terraform_resources, sample_azure_resources):
     assert len(tag_drift) >= 1
 
 
-def test_drift_detection_disabled():
+def test_drift_detection_disabled(make_tf_vnet, make_azure_vnet):
     """Test that drift detection can be disabled."""
-    from diagram_generator.models import AzureResource, TerraformResource
-
-    tf_resources = [
-        TerraformResource(
-            type="azurerm_virtual_network",
-            name="main",
-            address="azurerm_virtual_network.main",
-            values={
-                "id": "/subscriptions/sub-123/resourceGroups/rg-test/providers/Microsoft.Network/virtualNetworks/vnet-main",
-                "tags": {"env": "dev"},
-            },
-            depends_on=[],
-        )
-    ]
-
-    azure_resources = [
-        AzureResource(
-            id="/subscriptions/sub-123/resourceGroups/rg-test/providers/Microsoft.Network/virtualNetworks/vnet-main",
-            name="vnet-main",
-            type="Microsoft.Network/virtualNetworks",
-            location="eastus",
-            resource_group="rg-test",
-            tags={"env": "prod"},  # Different tags
-            properties={},
-        )
-    ]
+    tf_resources = [make_tf_vnet(tags={"env": "dev"})]
+    azure_resources = [make_azure_vnet(tags={"env": "prod"})]  # Different tags
 
     correlator = ResourceCorrelator(enable_drift_detection=False)
     result = correlator.correlate(
@@ -170,10 +156,6 @@ def test_index_resources_by_tags(sample_terraform_resources):
 
 def test_extract_resource_group_from_id():
     """Test resource group extraction."""
-    from unittest.mock import patch
-
-    from diagram_generator.azure_collector import AzureResourceGraphCollector
-
     with patch("diagram_generator.azure_collector.AzureCliCredential"):
         collector = AzureResourceGraphCollector(subscription_id="sub-123")
         resource_id = "/subscriptions/sub-123/resourceGroups/my-rg/providers/Microsoft.Network/virtualNetworks/vnet"
@@ -182,23 +164,18 @@ def test_extract_resource_group_from_id():
         assert rg == "my-rg"
 
 
-def test_match_origin_pool_to_vms():
+def test_match_origin_pool_to_vms(make_f5xc_pool):
     """Test matching F5 XC origin pool to Azure VMs."""
-    from diagram_generator.models import AzureResource, F5XCResource
-
-    origin_pool = F5XCResource(
-        type="origin_pool",
-        namespace="production",
-        name="pool-web",
+    origin_pool = make_f5xc_pool(
         spec={
             "origin_servers": [
                 {"private_ip": {"ip": "10.0.1.10"}},
                 {"private_ip": {"ip": "10.0.1.11"}},
             ]
-        },
-        metadata={"name": "pool-web"},
+        }
     )
 
+    # Full constructor: keeps one path through model validation in these tests
     azure_vms = [
         AzureResource(
             id="/subscriptions/sub-123/resourceGroups/rg-test/providers/Microsoft.Compute/virtualMachines/vm-app01",
@@ -231,44 +208,11 @@ def test_match_origin_pool_to_vms():
     assert relationships[0].relationship_type == RelationshipType.F5XC_ORIGIN_TO_AZURE_VM
 
 
-def test_correlate_by_tags_matching():
+def test_correlate_by_tags_matching(make_tf_vnet, make_azure_vnet, make_f5xc_pool):
     """Test tag-based correlation finds matches."""
-    from diagram_generator.models import AzureResource, F5XCResource, TerraformResource
-
-    tf_resources = [
-        TerraformResource(
-            type="azurerm_virtual_network",
-            name="main",
-            address="azurerm_virtual_network.main",
-            values={
-                "id": "/subscriptions/sub-123/resourceGroups/rg-test/providers/Microsoft.Network/virtualNetworks/vnet-main",
-                "tags": {"app": "web", "env": "prod"},
-            },
-            depends_on=[],
-        )
-    ]
-
-    azure_resources = [
-        AzureResource(
-            id="/subscriptions/sub-123/resourceGroups/rg-test/providers/Microsoft.Network/virtualNetworks/vnet-main",
-            name="vnet-main",
-            type="Microsoft.Network/virtualNetworks",
-            location="eastus",
-            resource_group="rg-test",
-            tags={"app": "web", "env": "prod"},
-            properties={},
-        )
-    ]
-
-    f5xc_resources = [
-        F5XCResource(
-            type="origin_pool",
-            namespace="production",
-            name="pool-web",
-            spec={},
-            metadata={"name": "pool-web", "labels": {"app": "web"}},
-        )
-    ]
+    tf_resources = [make_tf_vnet(tags={"app": "web", "env": "prod"})]
+    azure_resources = [make_azure_vnet(tags={"app": "web", "env": "prod"})]
+    f5xc_resources = [make_f5xc_pool(metadata={"name": "pool-web", "labels": {"app": "web"}})]
 
     correlator = ResourceCorrelator(match_by_tags=True)
     result = correlator.correlate(
@@ -288,8 +232,6 @@ def test_correlate_by_tags_matching():
 
 def test_correlation_error_handling():
     """Test that correlation handles errors gracefully."""
-    from diagram_generator.models import TerraformResource
-
     # Create invalid resource that might cause issues
     bad_resource = TerraformResource(
         type="test",
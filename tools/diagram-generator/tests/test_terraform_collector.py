@@ -3,6 +3,7 @@ Tests for Terraform state collector.
 """
 
 import json
+import os
 import subprocess
 from unittest.mock import Mock, patch
 
@@ -23,23 +24,28 @@ def test_terraform_collector_with_path(tmp_path):
     assert str(collector.state_path) == str(tmp_path)
 
 
-def test_collect_resources_success(mock_terraform_state):
-    """Test successful resource collection."""
+def test_parse_resources_success(mock_terraform_state):
+    """Test parsing resources from Terraform state."""
+    collector = TerraformStateCollector()
+    resources = collector._parse_resources(mock_terraform_state)
+
+    assert len(resources) == 2
+    assert resources[0].type == "azurerm_virtual_network"
+    assert resources[0].name == "main"
+    assert resources[1].type == "azurerm_subnet"
+    assert resources[1].depends_on == ["azurerm_virtual_network.main"]
+
+
+def test_collect_resources_invokes_terraform(tmp_path):
+    """Test that collection runs terraform show -json in the state directory."""
     with patch("subprocess.run") as mock_run:
-        # Mock successful terraform command
-        mock_result = Mock()
-        mock_result.stdout = json.dumps(mock_terraform_state)
-        mock_result.returncode = 0
-        mock_run.return_value = mock_result
+        mock_run.return_value = Mock(stdout=b'{"values": {"root_module": {}}}', returncode=0)
 
-        collector = TerraformStateCollector()
-        resources = collector.collect_resources()
+        collector = TerraformStateCollector(state_path=str(tmp_path))
+        assert collector.collect_resources() == []
 
-        assert len(resources) == 2
-        assert resources[0].type == "azurerm_virtual_network"
-        assert resources[0].name == "main"
-        assert resources[1].type == "azurerm_subnet"
-        assert resources[1].depends_on == ["azurerm_virtual_network.main"]
+        assert mock_run.call_args.args[0] == ["terraform", "show", "-json"]
+        assert mock_run.call_args.kwargs["cwd"] == str(tmp_path)
 
 
 def test_collect_resources_terraform_not_found():
@@ -106,38 +112,34 @@ def test_parse_resources_missing_fields():
     assert len(resources) == 0 or resources[0].type == "unknown"
 
 
-def test_parse_resources_with_values(sample_terraform_resources):
+def test_parse_resources_with_values():
     """Test that resource values are properly captured."""
-    with patch("subprocess.run") as mock_run:
-        mock_state = {
-            "values": {
-                "root_module": {
-                    "resources": [
-                        {
-                            "type": "azurerm_virtual_network",
-                            "name": "main",
-                            "address": "azurerm_virtual_network.main",
-                            "values": {
-                                "id": "/subscriptions/sub-123/resourceGroups/rg-test/providers/Microsoft.Network/virtualNetworks/vnet-main",
-                                "tags": {"environment": "test"},
-                            },
-                            "depends_on": [],
-                        }
-                    ]
-                }
+    state_data = {
+        "values": {
+            "root_module": {
+                "resources": [
+                    {
+                        "type": "azurerm_virtual_network",
+                        "name": "main",
+                        "address": "azurerm_virtual_network.main",
+                        "values": {
+                            "id": "/subscriptions/sub-123/resourceGroups/rg-test/providers/Microsoft.Network/virtualNetworks/vnet-main",
+                            "tags": {"environment": "test"},
+                        },
+                        "depends_on": [],
+                    }
+                ]
             }
         }
-        mock_result = Mock()
-        mock_result.stdout = json.dumps(mock_state)
-        mock_run.return_value = mock_result
+    }
 
-        collector = TerraformStateCollector()
-        resources = collector.collect_resources()
+    collector = TerraformStateCollector()
+    resources = collector._parse_resources(state_data)
 
-        assert len(resources) == 1
-        assert "id" in resources[0].values
-        assert "tags" in resources[0].values
-        assert resources[0].values["tags"]["environment"] == "test"
+    assert len(resources) == 1
+    assert "id" in resources[0].values
+    assert "tags" in resources[0].values
+    assert resources[0].values["tags"]["environment"] == "test"
 
 
 def test_retry_on_failure():
@@ -154,3 +156,73 @@ def test_retry_on_failure():
 
         assert len(resources) == 0
         assert mock_run.call_count == 2  # Retry happened
+
+
+def test_state_cached_by_mtime(tmp_path, mock_terraform_state):
+    """Test that terraform show runs once while terraform.tfstate is unchanged."""
+    state_file = tmp_path / "terraform.tfstate"
+    state_file.write_text("{}")
+
+    with patch("subprocess.run") as mock_run:
+        mock_run.return_value = Mock(stdout=json.dumps(mock_terraform_state), returncode=0)
+
+        collector = TerraformStateCollector(state_path=str(tmp_path))
+        assert len(collector.collect_resources()) == 2
+        collector.extract_resource_groups()
+        assert mock_run.call_count == 1
+
+        # A new state file version invalidates the cache
+        mtime_ns = state_file.stat().st_mtime_ns + 1_000_000_000
+        os.utime(state_file, ns=(mtime_ns, mtime_ns))
+        assert len(collector.collect_resources()) == 2
+        assert mock_run.call_count == 2
+
+
+def test_extract_resource_groups_includes_child_modules():
+    """Test resource groups are found in root and nested modules."""
+    state = {
+        "values": {
+            "root_module": {
+                "resources": [
+                    {"type": "azurerm_resource_group", "values": {"name": "rg-root"}},
+                    {"type": "azurerm_virtual_network", "values": {"name": "vnet"}},
+                ],
+                "child_modules": [
+                    {
+                        "resources": [
+                            {"type": "azurerm_resource_group", "values": {"name": "rg-child"}}
+                        ]
+                    }
+                ],
+            }
+        }
+    }
+    with patch("subprocess.run") as mock_run:
+        mock_run.return_value = Mock(stdout=json.dumps(state), returncode=0)
+
+        collector = TerraformStateCollector()
+        assert sorted(collector.extract_resource_groups()) == ["rg-child", "rg-root"]
+
+
+def test_parse_resources_includes_child_modules():
+    """Test that resources in nested modules are parsed in module order."""
+    collector = TerraformStateCollector()
+    state_data = {
+        "values": {
+            "root_module": {
+                "resources": [{"type": "azurerm_resource_group", "address": "root"}],
+                "child_modules": [
+                    {
+                        "resources": [{"type": "azurerm_subnet", "address": "module.a"}],
+                        "child_modules": [
+                            {"resources": [{"type": "azurerm_subnet", "address": "module.a.b"}]}
+                        ],
+                    },
+                    {"resources": [{"type": "azurerm_subnet", "address": "module.c"}]},
+                ],
+            }
+        }
+    }
+
+    resources = collector._parse_resources(state_data)
+    assert [r.address for r in resources] == ["root", "module.a", "module.a.b", "module.c"]